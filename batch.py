@@ -0,0 +1,141 @@
+"""
+batch.py : vectorised NumPy engine evaluating many game states at once
+
+Every state's draw tree is expanded breadth-first over the 10 ranks as flat NumPy arrays.
+Rows that have drawn the same multiset of cards for the same state are merged after each
+draw, so the frontier stays as small as the memoised recursion in blackjack.py.
+"""
+
+import numpy as np
+
+import blackjack
+
+# Config
+CHUNK_SIZE = 256  # States expanded together, bounds peak memory
+
+BUST_COLUMN = 22  # Column of final_totals_batch holding the bust probability
+ADD_CARD = np.array(blackjack.ADD_CARD_TABLE, dtype=np.int8)  # blackjack.ADD_CARD_TABLE as an array
+BEST_TOTALS = np.array(blackjack.BEST_TOTALS, dtype=np.int16)  # Best total per hand code, 0 when busted
+
+# Drawn cards are packed into one int64 key per row: 5 bits per rank plus the owning state above them
+_DRAWN_BITS = 5
+_DRAWN_SHIFTS = np.arange(len(blackjack.RANKS), dtype=np.int64) * _DRAWN_BITS
+_DRAWN_STEPS = np.left_shift(np.int64(1), _DRAWN_SHIFTS)
+_OWNER_SHIFT = _DRAWN_BITS * len(blackjack.RANKS)
+
+
+def final_totals_batch(counts, codes, stop_values) -> np.ndarray:
+    """
+    Calculate the distribution of final totals when drawing until reaching a stop value.
+
+    :param counts: Array (N, 10) of rank counts for each state's remaining deck
+    :param codes: Array (N,) of hand codes as returned by blackjack.hand_code
+    :param stop_values: Array (N,) of the best total at which each hand stops drawing
+    :return: Array (N, 23) where column t is the probability of stopping on t and column 22 of busting
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    max_states = (1 << (63 - _OWNER_SHIFT)) - 1
+    if len(counts) > max_states:
+        raise ValueError(f"At most {max_states} states can be expanded at once, got {len(counts)}")
+    stop_values = np.asarray(stop_values, dtype=np.int16)
+    result = np.zeros((len(counts), BUST_COLUMN + 1))
+
+    owner = np.arange(len(counts), dtype=np.int64)
+    key = owner << _OWNER_SHIFT
+    code = np.asarray(codes, dtype=np.int8)
+    weight = np.ones(len(counts))
+
+    while len(owner):
+        # Settle every row that has busted or reached its stop value
+        best = BEST_TOTALS[code]
+        busted = code == blackjack.BUST_CODE
+        done = busted | (best >= stop_values[owner])
+        np.add.at(result, (owner[done], np.where(busted[done], BUST_COLUMN, best[done])), weight[done])
+
+        drawing = ~done
+        owner, key, weight = owner[drawing], key[drawing], weight[drawing]
+        code = code[drawing]
+        if not len(owner):
+            break
+
+        # Remaining deck of each row is its state's deck minus the cards drawn so far
+        remaining = counts[owner] - ((key[:, None] >> _DRAWN_SHIFTS) & ((1 << _DRAWN_BITS) - 1))
+        total = remaining.sum(axis=1)
+
+        # Branch every row once per rank, weighted by count/total
+        ranks = len(blackjack.RANKS)
+        branch_weight = (weight / np.maximum(total, 1))[:, None] * remaining
+        valid = (remaining > 0).ravel()
+        child_owner = np.repeat(owner, ranks)[valid]
+        child_key = (key[:, None] + _DRAWN_STEPS).ravel()[valid]
+        child_code = ADD_CARD[code].ravel()[valid]
+        child_weight = branch_weight.ravel()[valid]
+
+        # Merge rows that drew the same multiset for the same state
+        key, first, inverse = np.unique(child_key, return_index=True, return_inverse=True)
+        weight = np.bincount(inverse.ravel(), weights=child_weight, minlength=len(key))
+        owner, code = child_owner[first], child_code[first]
+
+    return result
+
+
+def _state_codes(hands) -> np.ndarray:
+    """Hand codes of an (N, 2+) array of hand states."""
+    hands = np.atleast_2d(np.asarray(hands, dtype=np.int16))
+    return np.array([blackjack.state_code((hard, soft)) for hard, soft in hands[:, :2].tolist()], dtype=np.int8)
+
+
+def dealer_distribution_batch(decks, dealer_cards) -> np.ndarray:
+    """
+    Calculate the dealer's outcome distribution for many upcards and shoes at once.
+
+    :param decks: Array (N, 10) of rank counts, or a single (10,) shoe shared by every state
+    :param dealer_cards: Array (N,) of dealer upcards (2-11)
+    :return: Array (N, 6) ordered as blackjack.DEALER_OUTCOMES
+    """
+    dealer_cards = np.atleast_1d(np.asarray(dealer_cards, dtype=np.int16))
+    decks = np.broadcast_to(np.asarray(decks, dtype=np.int64), (len(dealer_cards), len(blackjack.RANKS)))
+    stop = np.full(len(dealer_cards), blackjack.DEALER_STAND_VALUE)
+
+    totals = final_totals_batch(decks, ADD_CARD[0, dealer_cards - 2], stop)  # Code 0 is the empty hand
+    return np.column_stack([totals[:, blackjack.DEALER_STAND_VALUE:22], totals[:, BUST_COLUMN]])
+
+
+def calculate_all_batch(decks, hands, dealer_cards, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Calculate win, stand and hit probabilities for many game states at once.
+
+    Equivalent to calling blackjack.calculate_all on each state with a single dealer upcard.
+
+    :param decks: Array (N, 10) of rank counts, or a single (10,) shoe shared by every state
+    :param hands: Array (N, 2) or (N, 3) of player hand states as returned by blackjack.hand_state
+    :param dealer_cards: Array (N,) of dealer upcards (2-11)
+    :param chunk_size: Number of states expanded together (default=CHUNK_SIZE)
+    :return: Array (N, 3) of (win probability, stand probability, hit probability)
+    """
+    codes = _state_codes(hands)
+    dealer_cards = np.broadcast_to(np.asarray(dealer_cards, dtype=np.int16), codes.shape)
+    decks = np.broadcast_to(np.asarray(decks, dtype=np.int64), (len(codes), len(blackjack.RANKS)))
+
+    results = np.empty((len(codes), 3))
+    targets = np.arange(blackjack.DEALER_STAND_VALUE, 22)
+    for start in range(0, len(codes), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        size = len(codes[chunk])
+        dealer = dealer_distribution_batch(decks[chunk], dealer_cards[chunk])
+
+        # Probability of the player reaching at least each dealer total, one row per (state, target)
+        reached = final_totals_batch(np.repeat(decks[chunk], len(targets), axis=0),
+                                     np.repeat(codes[chunk], len(targets)),
+                                     np.tile(targets, size))
+        player = reached[:, :22].sum(axis=1).reshape(size, len(targets))
+
+        win = dealer[:, -1] + (dealer[:, :-1] * player).sum(axis=1)
+
+        # Standing wins when the dealer busts or finishes at or below the player's total
+        best = BEST_TOTALS[codes[chunk]]
+        stand = dealer[:, -1] + (dealer[:, :-1] * (targets <= best[:, None])).sum(axis=1)
+
+        results[chunk] = np.column_stack([win, stand, win - stand])
+
+    return results
@@ -0,0 +1,250 @@
+"""
+benchmarks.py : benchmark suite for the probability engine
+
+Times the public functions of blackjack.py across 1/2/6/8-deck shoes, common upcards and
+multi-card hands. Every case is measured cold (memo caches cleared before each call) and warm
+(caches already filled by a first call). The precomputed dealer table is left out unless
+--dealer-table is given, so cold dealer cases time the recursion whether or not
+dealer_tables.npy has been built; the JSON records which was used. Results are written as JSON named after the current
+git commit, so runs from different versions can be compared with --compare.
+
+--nodes instead reports the cold cost per recursion node and the peak traced memory of each
+recursion, which tracks the per-branch overhead independently of how many nodes a case visits.
+
+Usage: python benchmarks.py [--decks 1 2 6 8] [--filter calculate_all] [--repeat 3]
+                            [--output DIR] [--compare OLD.json] [--nodes] [--dealer-table]
+"""
+
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+
+import blackjack
+import profiling
+
+# Config
+DECKS = (1, 2, 6, 8)
+UPCARDS = (2, 6, 10, 11)
+HANDS = ((10, 6), (2, 3), (2, 3, 4), (11, 2, 3))
+REPEAT = 3  # Cold runs per case, and warm timing rounds
+WARM_MIN_SECONDS = 0.05  # Warm loops grow until one round takes at least this long
+REGRESSION_RATIO = 1.2  # Slowdown reported as a regression by --compare
+RESULTS_DIR = "benchmark_results"
+
+
+def remaining_deck(decks: int, hand: tuple, upcard: int) -> tuple:
+    """
+    Build the shoe left after dealing a hand and an upcard.
+
+    :param decks: Number of decks in the shoe
+    :param hand: Tuple containing the player's hand
+    :param upcard: The dealer's upcard (2-11)
+    :return: Tuple of the remaining cards
+    """
+    deck = list(blackjack.SINGLE_DECK * decks)
+    for card in hand + (upcard,):
+        deck.remove(card)
+    return tuple(deck)
+
+
+def benchmark_cases(deck_counts=DECKS):
+    """
+    Generate every benchmark case.
+
+    :param deck_counts: Shoe sizes (in decks) to include
+    :return: Generator of (case name, function, args)
+    """
+    for hand in HANDS:
+        yield f"blackjack[hand={'-'.join(map(str, hand))}]", blackjack.blackjack, (list(hand),)
+
+    for decks in deck_counts:
+        for hand in HANDS:
+            label = f"decks={decks},hand={'-'.join(map(str, hand))}"
+            deck = remaining_deck(decks, hand, UPCARDS[0])
+            yield f"player_probability_busted[{label}]", blackjack.player_probability_busted, (deck, hand)
+            yield f"card_probabilities[{label},value=19]", blackjack.card_probabilities, (deck, hand, 19)
+            yield (f"final_total_distribution[{label},stop=17]", blackjack.final_total_distribution,
+                   (deck, hand, 17))
+
+        for upcard in UPCARDS:
+            label = f"decks={decks},up={upcard}"
+            deck = remaining_deck(decks, HANDS[0], upcard)
+            yield (f"dealer_probability_busted[{label}]", blackjack.dealer_probability_busted,
+                   (deck, (upcard,), blackjack.DEALER_STAND_VALUE))
+            yield f"dealer_probability[{label},value=19]", blackjack.dealer_probability, (deck, (upcard,), 19)
+
+            for hand in HANDS:
+                deck = remaining_deck(decks, hand, upcard)
+                yield (f"calculate_all[{label},hand={'-'.join(map(str, hand))}]", blackjack.calculate_all,
+                       (deck, hand, (upcard,)))
+
+
+def time_cold(function, args, repeat: int = REPEAT) -> float:
+    """Median time of one call with every memo cache cleared beforehand."""
+    times = []
+    for _ in range(repeat):
+        blackjack.clear_caches()
+        start = perf_counter()
+        function(*args)
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def time_warm(function, args, repeat: int = REPEAT) -> float:
+    """Best per-call time once the memo caches hold the case."""
+    function(*args)
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            function(*args)
+        if perf_counter() - start >= WARM_MIN_SECONDS:
+            break
+        number *= 10
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            function(*args)
+        best = min(best, (perf_counter() - start) / number)
+    return best
+
+
+def node_costs(deck_counts=DECKS, repeat: int = REPEAT) -> list:
+    """
+    Measure the cold cost per recursion node of the card and dealer recursions.
+
+    :param deck_counts: Shoe sizes (in decks) to include
+    :param repeat: Cold runs per case, the fastest is kept
+    :return: List of (case name, nodes, seconds per node, peak traced bytes)
+    """
+    hand = HANDS[1]
+    results = []
+    for decks in deck_counts:
+        counts = blackjack.deck_to_counts(remaining_deck(decks, hand, UPCARDS[0]))
+        cases = (
+            ("card_probabilities", lambda: [blackjack.card_probabilities_counts(counts, hand, value)
+                                            for value in range(17, 22)]),
+            ("dealer_distribution", lambda: blackjack.dealer_distribution_counts(counts, (UPCARDS[0],),
+                                                                                  use_table=False)),
+        )
+        for name, function in cases:
+            seconds = time_cold(function, (), repeat)
+            blackjack.clear_caches()
+            with profiling.profile(memory=True) as stats:
+                function()
+            nodes = sum(stats.nodes.values())
+            results.append((f"{name}[decks={decks}]", nodes, seconds / nodes, stats.peak_memory))
+            print(f"{results[-1][0]:<40} {nodes:>8} nodes {seconds / nodes * 1e6:>8.2f}us/node "
+                  f"peak {stats.peak_memory / 1024:>8.1f}KiB")
+    return results
+
+
+def git_revision() -> str:
+    """Short hash of the checked-out commit, or "unknown" outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(deck_counts=DECKS, name_filter: str = None, repeat: int = REPEAT,
+                   dealer_table: bool = False) -> dict:
+    """
+    Run every matching benchmark case cold and warm.
+
+    :param deck_counts: Shoe sizes (in decks) to include
+    :param name_filter: Only run cases whose name contains this text (default: all)
+    :param repeat: Cold runs per case and warm timing rounds (default=REPEAT)
+    :param dealer_table: Whether dealer cases may use the precomputed dealer table (default=False)
+    :return: Dictionary with run metadata and {case name: {"cold": seconds, "warm": seconds}}
+    """
+    if dealer_table:
+        table_size = blackjack.load_dealer_table()
+    else:
+        blackjack.unload_dealer_table()
+        table_size = 0
+
+    results = {}
+    for name, function, args in benchmark_cases(deck_counts):
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = {"cold": time_cold(function, args, repeat), "warm": time_warm(function, args, repeat)}
+        print(f"{name:<60} cold {results[name]['cold'] * 1000:>10.3f}ms  warm {results[name]['warm'] * 1e6:>10.2f}us")
+
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "dealer_table": table_size > 0,
+        "dealer_table_size": table_size,
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict, ratio: float = REGRESSION_RATIO) -> list:
+    """
+    Compare two benchmark runs case by case.
+
+    :param old: Earlier result of run_benchmarks
+    :param new: Later result of run_benchmarks
+    :param ratio: Slowdown reported as a regression (default=REGRESSION_RATIO)
+    :return: List of (case name, variant, old seconds, new seconds) for every regression
+    """
+    regressions = []
+    for name, timings in new["results"].items():
+        if name not in old["results"]:
+            continue
+        for variant, seconds in timings.items():
+            before = old["results"][name][variant]
+            if before > 0 and seconds / before > ratio:
+                regressions.append((name, variant, before, seconds))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the probability engine")
+    parser.add_argument("--decks", type=int, nargs="+", default=list(DECKS), help="shoe sizes (default: 1 2 6 8)")
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help=f"runs per case (default: {REPEAT})")
+    parser.add_argument("--output", default=RESULTS_DIR, help="directory for the results (default: %(default)s)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--nodes", action="store_true", help="only report the cost per recursion node")
+    parser.add_argument("--dealer-table", action="store_true", help="let dealer cases use dealer_tables.npy")
+    args = parser.parse_args()
+
+    if args.nodes:
+        node_costs(args.decks, args.repeat)
+        return
+
+    run = run_benchmarks(args.decks, args.filter, args.repeat, args.dealer_table)
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    path = os.path.join(args.output, f"{run['revision']}.json")
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"Wrote {len(run['results'])} results to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if old.get("dealer_table") != run["dealer_table"]:
+            print(f"WARNING {old['revision']} dealer_table={old.get('dealer_table')}, this run "
+                  f"dealer_table={run['dealer_table']}: dealer cases are not comparable")
+        regressions = compare(old, run)
+        for name, variant, before, after in regressions:
+            print(f"REGRESSION {name} {variant}: {before * 1000:.3f}ms -> {after * 1000:.3f}ms ({after / before:.2f}x)")
+        print(f"{len(regressions)} regressions against {old['revision']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,56 @@
 blackjack.py : all functions related to calculating blackjack probability
 """
 
-from functools import lru_cache
-from time import time
+from array import array
+from collections import namedtuple
+from numbers import Integral
+from time import perf_counter
 from time import sleep
 
 import logging
-import sys
+import os
+
+from memo import memoize
+from memo import cache_stats
+from memo import clear_caches
+from memo import configure_cache
+import profiling
 
 # Config
-logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
-CACHE_MAXSIZE = 20_000
+CACHE_POLICY = "lru"  # Eviction policy for the memo stores: "lru", "lfu" or "arc"
+CACHE_BUDGETS = {  # Maximum number of entries per memo store, tune with configure_cache()
+    "dealer_probability_busted": 50_000,
+    "dealer_probability": 50_000,
+    "card_probabilities": 200_000,
+    "dealer_distribution": 100_000,
+    "final_totals": 200_000,
+    "lookahead_nodes": 1_000,
+    "incremental_engine": 256,
+}
+RANKS = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)  # Card values, index 0 is 2 and index 9 is an ace
+SINGLE_DECK = (2, 3, 4, 5, 6, 7, 8, 9) * 4 + (10,) * 16 + (11,) * 4  # One 52-card deck as values
+SINGLE_DECK_COUNTS = (4, 4, 4, 4, 4, 4, 4, 4, 16, 4)  # One deck as rank counts: 2-9, 10/J/Q/K, A
+DEALER_STAND_VALUE = 17
+DEALER_OUTCOMES = (17, 18, 19, 20, 21, "bust")  # Order of the dealer_distribution vector
+NEXT_TOTALS = tuple(range(2, 22)) + ("bust",)  # Order of the next_card_distribution vector
+FINAL_TOTALS = tuple(range(22)) + ("bust",)  # Order of the final_total_distribution vector
+MAX_DRAWS = 21  # Every draw adds at least 1 to the hard total, so every hand has stopped by then
+LOOKAHEAD_NODE_BUDGET = 100_000  # Default cap on the estimated recursion nodes of one lookahead
+CALCULATION_MODES = ("exact", "sampled", "auto", "infinite")
+SAMPLE_TIME_BUDGET = 0.05  # Default latency budget in seconds for the sampled and auto modes
+DEALER_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dealer_tables.npy")
+
+Lookahead = namedtuple("Lookahead", ["distribution", "truncated", "depth"])
+
+logger = logging.getLogger(__name__)  # Configured by the application, blackjack adds no handlers
+
+# Profiling callback installed by set_stats_callback()
+_stats_callback = None
+_stats_memory = False
+
+# Precomputed dealer outcome table (built by dealer_tables.py), loaded on first use
+_dealer_table = None  # (counts, upcard) -> row index
+_dealer_table_rows = None
 
 
 def blackjack(cards: list) -> list:
@@ -43,103 +83,573 @@ def blackjack(cards: list) -> list:
         return total
 
 
-@lru_cache(maxsize=CACHE_MAXSIZE)
-def dealer_probability_busted(deck: tuple, dealer_hand: tuple, stand_value: int) -> float:
+def deck_to_counts(deck) -> tuple:
     """
-    Calculate the probability of the dealer busting.
+    Convert a flat deck of card values into a rank-count vector.
 
-    :param deck: Tuple containing the remaining cards in the deck
-    :param dealer_hand: Tuple containing the dealer's current hand
-    :param stand_value: The minimum value at which the dealer must stand
-    :return: Probability (0.0-1.0) of the dealer busting
+    :param deck: Iterable of card values (2-11)
+    :return: Tuple of 10 counts, index 0 for 2s through index 9 for aces
+    """
+    counts = [0] * len(RANKS)
+    for card in deck:
+        counts[card - 2] += 1
+    return tuple(counts)
+
+
+def counts_to_deck(counts: tuple) -> tuple:
+    """
+    Convert a rank-count vector back into a flat, sorted deck of card values.
+
+    :param counts: Tuple of 10 rank counts as returned by deck_to_counts
+    :return: Tuple of card values
+    """
+    deck = []
+    for rank, count in zip(RANKS, counts):
+        deck.extend([rank] * count)
+    return tuple(deck)
+
+
+def hand_state(cards) -> tuple:
+    """
+    Canonicalise a hand into an order-insensitive state for caching.
+
+    :param cards: Iterable of cards in the hand
+    :return: Tuple of (hard total with aces as 1, whether the hand holds an ace, number of cards)
+    """
+    hard_total = 0
+    soft = False
+    count = 0
+    for card in cards:
+        if card == 11:
+            hard_total += 1
+            soft = True
+        else:
+            hard_total += card
+        count += 1
+    return hard_total, soft, count
+
+
+def state_values(state: tuple) -> list:
+    """
+    Calculate the total value of a canonical hand state.
+
+    :param state: Hand state as returned by hand_state
+    :return: List containing total value(s) in the same format as blackjack()
+    """
+    hard_total, soft, _ = state
+    if hard_total > 21:
+        return [1, 1]
+    elif not soft:
+        return [hard_total, hard_total]
+    elif hard_total + 10 > 21:  # Ace can only count as 1
+        return [hard_total]
+    else:
+        return [hard_total + 10, hard_total]
+
+
+def _encode(hard_total: int, soft: bool) -> int:
+    """Pack a hard total and soft flag into a hand code (see hand_code)."""
+    if hard_total > 21:
+        return BUST_CODE
+    return hard_total << 1 | (soft and hard_total + 10 <= 21)
+
+
+BUST_CODE = 44  # Hand codes 0-43 are (hard total << 1 | usable ace) for hard totals 0-21
+HARD_TOTALS = tuple(code >> 1 for code in range(BUST_CODE)) + (22,)
+BEST_TOTALS = tuple((code >> 1) + 10 * (code & 1) for code in range(BUST_CODE)) + (0,)
+ADD_CARD_TABLE = tuple(  # ADD_CARD_TABLE[code][card - 2] is the code after drawing card
+    tuple(_encode((code >> 1) + (1 if rank == 11 else rank), code & 1 or rank == 11) for rank in RANKS)
+    for code in range(BUST_CODE)
+) + ((BUST_CODE,) * len(RANKS),)
+
+
+def hand_code(cards) -> int:
+    """
+    Encode a hand as a small int for the recursions and their caches.
+
+    The code packs the hard total (aces as 1) with whether an ace can still count as 11; every
+    bust hand shares BUST_CODE. Hands with the same totals share a code whatever their size.
+
+    :param cards: Iterable of cards in the hand
+    :return: Hand code (0-44)
     """
-    deck = list(deck)
-    dealer_hand = list(dealer_hand)
+    code = 0
+    for card in cards:
+        code = ADD_CARD_TABLE[code][card - 2]
+    return code
+
+
+def state_code(state: tuple) -> int:
+    """
+    Encode a canonical hand state as a hand code.
+
+    :param state: Hand state as returned by hand_state
+    :return: Hand code (0-44), equal to hand_code of the same cards
+    """
+    return _encode(state[0], state[1])
+
+
+def add_card(code: int, card: int) -> int:
+    """
+    Add a card to a hand code in O(1) through ADD_CARD_TABLE.
+
+    :param code: Hand code as returned by hand_code
+    :param card: The card value to add (2-11)
+    :return: The new hand code
+    """
+    return ADD_CARD_TABLE[code][card - 2]
+
+
+def code_values(code: int) -> list:
+    """
+    Calculate the total value of a hand code.
+
+    :param code: Hand code as returned by hand_code
+    :return: List containing total value(s) in the same format as blackjack(), except that hands
+             whose aces can only count as 1 give [value, value]
+    """
+    if code == BUST_CODE:
+        return [1, 1]
+    return [BEST_TOTALS[code], HARD_TOTALS[code]]
+
 
-    hand = blackjack(dealer_hand)
+COUNT_BITS = 8  # Bits per rank in a packed shoe key, enough for 15 decks of tens
+_COUNT_STEPS = tuple(1 << (index * COUNT_BITS) for index in range(len(RANKS)))
 
+
+def _shoe(counts) -> tuple:
+    """
+    Build the in-place working shoe walked by the recursions.
+
+    The recursions take one card out of the array, recurse and put it back, so no deck copy is
+    made per branch. The packed key identifies the composition in the memo stores and is
+    updated by subtracting a per-rank step.
+
+    :param counts: Iterable of 10 rank counts
+    :return: Tuple of (array('H') of counts, packed key, number of cards)
+    """
+    shoe = array("H", counts)
+    if max(shoe, default=0) >= 1 << COUNT_BITS:
+        raise ValueError(f"At most {(1 << COUNT_BITS) - 1} cards of a rank are supported, got {tuple(counts)}")
+    return shoe, sum(count * step for count, step in zip(shoe, _COUNT_STEPS)), sum(shoe)
+
+
+@memoize("dealer_probability_busted", maxsize=CACHE_BUDGETS["dealer_probability_busted"], policy=CACHE_POLICY,
+         skip_args=1)
+def _dealer_probability_busted(shoe: array, key: int, total: int, code: int, stand_value: int) -> float:
+    """Cached recursion behind dealer_probability_busted_counts, keyed on the shoe key and a hand code."""
     # Check if the dealer has already busted
-    if hand == [1, 1]:
+    if code == BUST_CODE:
         return 1.0
 
-    # Determine the dealer's best hand value
-    max_value = hand[0]
-
     # If the dealer should stand based on the higher value
-    if max_value >= stand_value:
+    if BEST_TOTALS[code] >= stand_value or total == 0:
         return 0.0
 
     busted_probability = 0.0
+    next_codes = ADD_CARD_TABLE[code]
 
-    for card in deck:
-        curr_probability = 1 / len(deck)  # Current branch probability
+    # Branch once per rank, weighted by how many of that rank remain
+    for index, count in enumerate(shoe):
+        if count == 0:
+            continue
 
-        temp_deck = deck.copy()
-        temp_deck.remove(card)  # Remove card from the deck
+        shoe[index] = count - 1  # Remove card from the deck, restored after the branch
+        busted_probability += count * _dealer_probability_busted(shoe, key - _COUNT_STEPS[index], total - 1,
+                                                                 next_codes[index], stand_value)
+        shoe[index] = count
 
-        new_hand = dealer_hand.copy()
-        new_hand.append(card)  # Add new card to hand
+    return busted_probability / total
 
-        branch_probability = dealer_probability_busted(deck=tuple(temp_deck),
-                                                       dealer_hand=tuple(new_hand),
-                                                       stand_value=stand_value)
-        busted_probability += branch_probability * curr_probability
 
-    return busted_probability
+@memoize("dealer_probability", maxsize=CACHE_BUDGETS["dealer_probability"], policy=CACHE_POLICY, skip_args=1)
+def _dealer_probability(shoe: array, key: int, total: int, code: int, value: int) -> float:
+    """Cached recursion behind dealer_probability_counts, keyed on the shoe key and a hand code."""
+    # Check if the dealer has already busted
+    if code == BUST_CODE:
+        return 0.0
 
+    # If the dealer's best value is at the target value
+    best = BEST_TOTALS[code]
+    if best == value:
+        return 1.0
+    elif best >= 17 or total == 0:  # No need to count as higher than value already
+        return 0.0
 
-@lru_cache(maxsize=CACHE_MAXSIZE)
-def dealer_probability(deck: tuple, dealer_hand: tuple, value: int) -> float:
+    value_probability = 0.0
+    next_codes = ADD_CARD_TABLE[code]
+
+    for index, count in enumerate(shoe):
+        if count == 0:
+            continue
+
+        shoe[index] = count - 1  # Remove card from the deck, restored after the branch
+        value_probability += count * _dealer_probability(shoe, key - _COUNT_STEPS[index], total - 1,
+                                                         next_codes[index], value)
+        shoe[index] = count
+
+    return value_probability / total
+
+
+@memoize("card_probabilities", maxsize=CACHE_BUDGETS["card_probabilities"], policy=CACHE_POLICY, skip_args=1)
+def _card_probabilities(shoe: array, key: int, total: int, code: int, value: int) -> float:
+    """Cached recursion behind card_probabilities_counts, keyed on the shoe key and a hand code."""
+    # Check if the hand has already busted
+    if code == BUST_CODE:
+        return 0.0
+
+    # Determine if the best value is the value that we are looking for or greater (not busted due to above)
+    if BEST_TOTALS[code] >= value:
+        return 1.0
+    if total == 0:
+        return 0.0
+
+    value_probability = 0.0
+    next_codes = ADD_CARD_TABLE[code]
+
+    for index, count in enumerate(shoe):
+        if count == 0:
+            continue
+
+        shoe[index] = count - 1  # Remove card from the deck, restored after the branch
+        value_probability += count * _card_probabilities(shoe, key - _COUNT_STEPS[index], total - 1,
+                                                         next_codes[index], value)
+        shoe[index] = count
+
+    return value_probability / total
+
+
+@memoize("dealer_distribution", maxsize=CACHE_BUDGETS["dealer_distribution"], policy=CACHE_POLICY, skip_args=1)
+def _dealer_distribution(shoe: array, key: int, total: int, code: int) -> tuple:
+    """Cached recursion behind dealer_distribution_counts, keyed on the shoe key and a hand code."""
+    # Check if the dealer has already busted
+    if code == BUST_CODE:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 1.0
+
+    # The dealer stands on the higher value
+    best = BEST_TOTALS[code]
+    if best >= DEALER_STAND_VALUE:
+        outcome = [0.0] * len(DEALER_OUTCOMES)
+        outcome[best - DEALER_STAND_VALUE] = 1.0
+        return tuple(outcome)
+    if total == 0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+
+    seventeen = eighteen = nineteen = twenty = twenty_one = busted = 0.0
+    next_codes = ADD_CARD_TABLE[code]
+
+    for index, count in enumerate(shoe):
+        if count == 0:
+            continue
+
+        shoe[index] = count - 1  # Remove card from the deck, restored after the branch
+        branch = _dealer_distribution(shoe, key - _COUNT_STEPS[index], total - 1, next_codes[index])
+        shoe[index] = count
+
+        seventeen += branch[0] * count
+        eighteen += branch[1] * count
+        nineteen += branch[2] * count
+        twenty += branch[3] * count
+        twenty_one += branch[4] * count
+        busted += branch[5] * count
+
+    return (seventeen / total, eighteen / total, nineteen / total, twenty / total, twenty_one / total,
+            busted / total)
+
+
+def dealer_probability_busted_counts(counts: tuple, dealer_hand: tuple, stand_value: int) -> float:
     """
-    Calculate the probability of the dealer getting an exact hand value.
+    Calculate the probability of the dealer busting from a rank-count vector.
 
-    :param deck: Tuple containing the remaining cards in the deck
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param dealer_hand: Tuple containing the dealer's current hand
+    :param stand_value: The minimum value at which the dealer must stand
+    :return: Probability (0.0-1.0) of the dealer busting
+    """
+    return _dealer_probability_busted(*_shoe(counts), hand_code(dealer_hand), stand_value)
+
+
+def dealer_probability_counts(counts: tuple, dealer_hand: tuple, value: int) -> float:
+    """
+    Calculate the probability of the dealer getting an exact hand value from a rank-count vector.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
     :param dealer_hand: Tuple containing the dealer's current hand
     :param value: The target hand value to calculate probability for
     :return: Probability (0.0-1.0) of dealer getting exactly this value
     """
-    deck = list(deck)
-    dealer_hand = list(dealer_hand)
+    return _dealer_probability(*_shoe(counts), hand_code(dealer_hand), value)
 
-    hand = blackjack(dealer_hand)
 
-    # Check if the dealer has already busted
-    if hand == [1, 1]:
-        return 0.0
+def card_probabilities_counts(counts: tuple, current_hand: tuple, value: int) -> float:
+    """
+    Calculate the probability of reaching at least the target hand value from a rank-count vector.
 
-    # Determine the dealer's best hand value
-    max_value = hand[0]
-    if len(hand) > 1:
-        min_value = hand[1]
-    else:
-        min_value = max_value
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param current_hand: Tuple containing the current hand cards
+    :param value: The minimum target value to calculate probability for
+    :return: Probability (0.0-1.0) of achieving the target value or higher
+    """
+    return _card_probabilities(*_shoe(counts), hand_code(current_hand), value)
 
-    # If either value is at the target value
-    if max_value == value or min_value == value:
-        return 1.0
-    elif max_value >= 17:  # No need to count as higher than value already
+
+@memoize("final_totals", maxsize=CACHE_BUDGETS["final_totals"], policy=CACHE_POLICY, skip_args=1)
+def _final_totals(shoe: array, key: int, total: int, code: int, stop_value: int, draws: int,
+                  truncating: bool) -> tuple:
+    """
+    Cached recursion behind final_total_distribution_counts, keyed on the shoe key and a hand code.
+
+    :return: Tuple ordered as FINAL_TOTALS, followed by the probability of being cut off by the depth cap
+    """
+    outcome = [0.0] * (len(FINAL_TOTALS) + 1)
+
+    # Check if the hand has already busted
+    if code == BUST_CODE:
+        outcome[-2] = 1.0
+        return tuple(outcome)
+
+    # Stop at the threshold, after the last draw, or when nothing is left to draw
+    best = BEST_TOTALS[code]
+    if best >= stop_value or draws == 0 or total == 0:
+        outcome[best] = 1.0
+        if truncating and draws == 0 and best < stop_value:
+            outcome[-1] = 1.0
+        return tuple(outcome)
+
+    next_codes = ADD_CARD_TABLE[code]
+    for index, count in enumerate(shoe):
+        if count == 0:
+            continue
+        if next_codes[index] == BUST_CODE:  # Busting cards end the hand, no need to recurse
+            outcome[-2] += count
+            continue
+
+        shoe[index] = count - 1  # Remove card from the deck, restored after the branch
+        branch = _final_totals(shoe, key - _COUNT_STEPS[index], total - 1, next_codes[index], stop_value,
+                               draws - 1, truncating)
+        shoe[index] = count
+
+        for position, probability in enumerate(branch):
+            if probability:
+                outcome[position] += probability * count
+
+    return tuple(probability / total for probability in outcome)
+
+
+@memoize("lookahead_nodes", maxsize=CACHE_BUDGETS["lookahead_nodes"], policy=CACHE_POLICY)
+def lookahead_nodes(counts: tuple, code: int, depth: int) -> tuple:
+    """
+    Estimate the recursion nodes of a lookahead for every depth cap up to depth.
+
+    Every multiset of drawn cards that leaves the hand unbusted is one node (busting draws are
+    added up without recursing), so the estimate counts the multisets of at most each number of
+    cards, limited by counts, whose hard total still fits under 21. It is exact when hitting until
+    bust and an upper bound once a stop value ends hands earlier.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param code: The hand code as returned by hand_code
+    :param depth: Largest depth cap to estimate
+    :return: Tuple where entry d is the estimated node count with at most d draws
+    """
+    gap = 21 - HARD_TOTALS[code]
+    if gap < 0:
+        return (1,) * (depth + 1)
+
+    # ways[cards][hard total] multisets, built one rank at a time
+    ways = [[0] * (gap + 1) for _ in range(depth + 1)]
+    ways[0][0] = 1
+    for rank, count in zip(RANKS, counts):
+        value = 1 if rank == 11 else rank
+        new_ways = [[0] * (gap + 1) for _ in range(depth + 1)]
+        for cards, row in enumerate(ways):
+            for hard, number in enumerate(row):
+                if number:
+                    for taken in range(min(count, depth - cards, (gap - hard) // value) + 1):
+                        new_ways[cards + taken][hard + taken * value] += number
+        ways = new_ways
+
+    nodes = []
+    for row in ways:
+        nodes.append((nodes[-1] if nodes else 0) + sum(row))
+    return tuple(nodes)
+
+
+def final_total_distribution_counts(counts: tuple, hand: tuple, stop_value: int = None, draws: int = None,
+                                    max_depth: int = None, max_nodes: int = LOOKAHEAD_NODE_BUDGET) -> Lookahead:
+    """
+    Calculate the distribution of the player's final total after hitting, in one memoised traversal.
+
+    The player keeps hitting while their best total is below stop_value, for at most draws cards.
+    With neither given the player stops at 17 or more, like the dealer. Worst-case latency is
+    capped by max_depth, and by max_nodes through lookahead_nodes: the depth is lowered until the
+    estimated traversal fits. Hands cut off by the cap are counted at the total they were cut at,
+    and that probability is reported as truncated.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param hand: Tuple containing the player's current hand
+    :param stop_value: Best total at which the player stops hitting (default: none when draws is given)
+    :param draws: Maximum number of cards to draw (default: no limit)
+    :param max_depth: Maximum number of cards to look ahead (default: no limit)
+    :param max_nodes: Cap on the estimated recursion nodes, None for no cap (default=LOOKAHEAD_NODE_BUDGET)
+    :return: Lookahead of (tuple ordered as FINAL_TOTALS, truncated probability, depth used)
+    """
+    if stop_value is None:
+        stop_value = DEALER_STAND_VALUE if draws is None else 22
+    draws = MAX_DRAWS if draws is None else min(draws, MAX_DRAWS)
+    if draws < 0:
+        raise ValueError(f"Cannot draw {draws} cards")
+
+    code = hand_code(hand)
+    depth = draws if max_depth is None else min(draws, max_depth)
+    if max_nodes is not None:
+        nodes = lookahead_nodes(tuple(counts), code, depth)
+        while depth > 0 and nodes[depth] > max_nodes:
+            depth -= 1
+
+    outcome = _final_totals(*_shoe(counts), code, stop_value, depth, depth < draws)
+    return Lookahead(outcome[:-1], outcome[-1], depth)
+
+
+def final_total_distribution(deck: tuple, hand: tuple, stop_value: int = None, draws: int = None,
+                             max_depth: int = None, max_nodes: int = LOOKAHEAD_NODE_BUDGET) -> Lookahead:
+    """
+    Calculate the distribution of the player's final total after hitting.
+
+    :param deck: Tuple containing the remaining cards in the deck
+    :param hand: Tuple containing the player's current hand
+    :param stop_value: Best total at which the player stops hitting (default: none when draws is given)
+    :param draws: Maximum number of cards to draw (default: no limit)
+    :param max_depth: Maximum number of cards to look ahead (default: no limit)
+    :param max_nodes: Cap on the estimated recursion nodes, None for no cap (default=LOOKAHEAD_NODE_BUDGET)
+    :return: Lookahead as returned by final_total_distribution_counts
+    """
+    return final_total_distribution_counts(deck_to_counts(deck), tuple(hand), stop_value, draws, max_depth,
+                                           max_nodes)
+
+
+def load_dealer_table(path: str = None) -> int:
+    """
+    Load the precomputed dealer outcome table, replacing any table already loaded.
+
+    The table is memory-mapped so only its index is held in memory. When the file or numpy
+    is missing the table is left empty and every query falls back to live recursion.
+
+    :param path: Path to the .npy table built by dealer_tables.py (default DEALER_TABLE_PATH)
+    :return: Number of shoe compositions in the loaded table
+    """
+    global _dealer_table, _dealer_table_rows
+    _dealer_table = {}
+    _dealer_table_rows = None
+
+    path = DEALER_TABLE_PATH if path is None else path
+    if not os.path.exists(path):
         return 0
 
-    value_probability = 0.0
+    try:
+        import numpy as np
+    except ImportError:
+        logger.warning(f"numpy is not installed, ignoring dealer table {path}")
+        return 0
 
-    for card in deck:
-        curr_probability = 1 / len(deck)  # Current branch probability
+    rows = np.load(path, mmap_mode="r")
+    for index, (counts, upcard) in enumerate(zip(rows["counts"].tolist(), rows["upcard"].tolist())):
+        _dealer_table[(tuple(counts), upcard)] = index
+    _dealer_table_rows = rows
+
+    return len(_dealer_table)
+
+
+def unload_dealer_table() -> None:
+    """
+    Empty the dealer table so every query runs the live recursion, until load_dealer_table() is called.
+    """
+    global _dealer_table, _dealer_table_rows
+    _dealer_table = {}
+    _dealer_table_rows = None
+
+
+def lookup_dealer_table(counts: tuple, upcard: int):
+    """
+    Look up the dealer's outcome distribution for an upcard in the precomputed table.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param upcard: The dealer's single visible card (2-11)
+    :return: Tuple of 6 probabilities as returned by dealer_distribution, or None when not in the table
+    """
+    if _dealer_table is None:
+        load_dealer_table()
+
+    index = _dealer_table.get((counts, upcard))
+    if index is None:
+        return None
+    return tuple(_dealer_table_rows["distribution"][index].tolist())
+
+
+def dealer_distribution_counts(counts: tuple, dealer_hand: tuple, use_table: bool = True) -> tuple:
+    """
+    Calculate the dealer's full outcome distribution from a rank-count vector in a single traversal.
+
+    A lone upcard is first looked up in the precomputed dealer table; live recursion is only used on a miss.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param dealer_hand: Tuple containing the dealer's current hand
+    :param use_table: Whether to consult the precomputed dealer table (default=True)
+    :return: Tuple of 6 probabilities: dealer finishing on 17, 18, 19, 20, 21, then busting
+    """
+    counts = tuple(counts)
+    if use_table and len(dealer_hand) == 1:
+        distribution = lookup_dealer_table(counts, dealer_hand[0])
+        if distribution is not None:
+            return distribution
+
+    return _dealer_distribution(*_shoe(counts), hand_code(dealer_hand))
+
+
+def dealer_distribution(deck: tuple, dealer_hand: tuple) -> tuple:
+    """
+    Calculate the dealer's full outcome distribution in a single traversal.
+
+    :param deck: Tuple containing the remaining cards in the deck
+    :param dealer_hand: Tuple containing the dealer's current hand
+    :return: Tuple of 6 probabilities: dealer finishing on 17, 18, 19, 20, 21, then busting
+    """
+    return dealer_distribution_counts(counts=deck_to_counts(deck), dealer_hand=tuple(dealer_hand))
+
+
+def dealer_probability_busted(deck: tuple, dealer_hand: tuple, stand_value: int) -> float:
+    """
+    Calculate the probability of the dealer busting.
 
-        temp_deck = deck.copy()
-        temp_deck.remove(card)  # Remove card from the deck
+    :param deck: Tuple containing the remaining cards in the deck
+    :param dealer_hand: Tuple containing the dealer's current hand
+    :param stand_value: The minimum value at which the dealer must stand
+    :return: Probability (0.0-1.0) of the dealer busting
+    """
+    if stand_value == DEALER_STAND_VALUE:
+        return dealer_distribution(deck=deck, dealer_hand=dealer_hand)[-1]
 
-        new_hand = dealer_hand.copy()
-        new_hand.append(card)  # Add new card to hand
+    return dealer_probability_busted_counts(counts=deck_to_counts(deck),
+                                            dealer_hand=tuple(dealer_hand),
+                                            stand_value=stand_value)
+
+
+def dealer_probability(deck: tuple, dealer_hand: tuple, value: int) -> float:
+    """
+    Calculate the probability of the dealer getting an exact hand value.
 
-        branch_probability = dealer_probability(deck=tuple(temp_deck),
-                                                dealer_hand=tuple(new_hand),
-                                                value=value)
-        value_probability += branch_probability * curr_probability
+    :param deck: Tuple containing the remaining cards in the deck
+    :param dealer_hand: Tuple containing the dealer's current hand
+    :param value: The target hand value to calculate probability for
+    :return: Probability (0.0-1.0) of dealer getting exactly this value
+    """
+    if DEALER_STAND_VALUE <= value <= 21:
+        return dealer_distribution(deck=deck, dealer_hand=dealer_hand)[value - DEALER_STAND_VALUE]
 
-    return value_probability
+    return dealer_probability_counts(counts=deck_to_counts(deck),
+                                     dealer_hand=tuple(dealer_hand),
+                                     value=value)
 
 
-@lru_cache(maxsize=CACHE_MAXSIZE)
 def card_probabilities(deck: tuple, current_hand: tuple, value: int) -> float:
     """
     Calculate the probability of getting a hand value equal to or greater than the target.
@@ -149,46 +659,66 @@ def card_probabilities(deck: tuple, current_hand: tuple, value: int) -> float:
     :param value: The minimum target value to calculate probability for
     :return: Probability (0.0-1.0) of achieving the target value or higher
     """
-    deck = list(deck)
-    current_hand = list(current_hand)
+    return card_probabilities_counts(counts=deck_to_counts(deck),
+                                     current_hand=tuple(current_hand),
+                                     value=value)
 
-    hand = blackjack(current_hand)
 
-    # Check if the hand has already busted
-    if hand == [1, 1]:
-        return 0.0
+def next_card_distribution_counts(counts: tuple, code: int) -> tuple:
+    """
+    Calculate the distribution of the hand's best total after drawing exactly one more card.
 
-    # Determine the hand's value
-    max_value = hand[0]
-    if len(hand) > 1:
-        min_value = hand[1]
-    else:
-        min_value = max_value
+    Each rank moves the hand to a single new code, so this is one pass over the 10 rank counts.
 
-    # Determine if max value is the value that we are looking for or greater (not busted due to above)
-    if max_value >= value or min_value >= value:
-        return 1.0
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param code: The hand code as returned by hand_code
+    :return: Tuple of probabilities ordered as NEXT_TOTALS (totals 2-21, then busting), all zero
+             when the hand has already busted or the deck is empty
+    """
+    distribution = [0.0] * len(NEXT_TOTALS)
+    total = sum(counts)
+    if code == BUST_CODE or total == 0:
+        return tuple(distribution)
 
-    value_probability = 0.0
+    next_codes = ADD_CARD_TABLE[code]
+    for index, count in enumerate(counts):
+        if count:
+            next_code = next_codes[index]
+            distribution[-1 if next_code == BUST_CODE else BEST_TOTALS[next_code] - 2] += count / total
+    return tuple(distribution)
 
-    for card in deck:
-        curr_probability = 1 / len(deck)  # Current branch probability
 
-        temp_deck = deck.copy()
-        temp_deck.remove(card)  # Remove card from the deck
+def next_card_distributions(counts, hands) -> list:
+    """
+    Calculate the next-card distribution of many hands in one call.
+
+    Hands sharing one shoe are grouped by hand code, so each distinct code is only worked out once.
+
+    :param counts: Tuple of 10 rank counts shared by every hand, or one such tuple per hand
+    :param hands: Iterable of hands (tuples of cards)
+    :return: List with one tuple ordered as NEXT_TOTALS per hand, in the order given
+    """
+    codes = [hand_code(hand) for hand in hands]
+    if len(counts) == len(RANKS) and all(isinstance(count, Integral) for count in counts):
+        distributions = {code: next_card_distribution_counts(counts, code) for code in set(codes)}
+        return [distributions[code] for code in codes]
+
+    if len(counts) != len(codes):
+        raise ValueError(f"Expected one shoe or {len(codes)} shoes, got {len(counts)}")
+    return [next_card_distribution_counts(shoe, code) for shoe, code in zip(counts, codes)]
 
-        new_hand = current_hand.copy()
-        new_hand.append(card)  # Add new card to hand
 
-        value_branch_probability = card_probabilities(deck=tuple(temp_deck),
-                                                      current_hand=tuple(new_hand),
-                                                      value=value)
-        value_probability += value_branch_probability * curr_probability
+def player_probability_busted_counts(counts: tuple, hand: tuple) -> float:
+    """
+    Calculate the probability of the player busting if they hit, from a rank-count vector.
 
-    return value_probability
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param hand: Tuple containing the player's current hand
+    :return: Probability (0.0-1.0) of busting when drawing one more card, 0 when already busted
+    """
+    return next_card_distribution_counts(counts, hand_code(hand))[-1]
 
 
-@lru_cache(maxsize=CACHE_MAXSIZE)
 def player_probability_busted(deck: tuple, hand: tuple) -> float:
     """
     Calculate the probability of the player busting if they hit (draw one more card).
@@ -197,85 +727,80 @@ def player_probability_busted(deck: tuple, hand: tuple) -> float:
     :param hand: Tuple containing the player's current hand
     :return: Probability (0.0-1.0) of busting when drawing one more card
     """
-    hand = list(hand)
-    deck = list(deck)
-
-    total: list = blackjack(hand)
-    maximum_pull: int = 21 - total[-1]
-    if total == [1, 1]:  # Busted already
-        return 0
-
-    can_pull: int = 0  # Counter for how many player can pull to not bust
-    for card in deck:
-        new_hand = hand.copy()
-        new_hand.append(card)
-        new_hand = blackjack(new_hand)[-1]
-        if new_hand == 1:
-            pass
-        elif (new_hand - sum(hand)) <= maximum_pull:
-            can_pull += 1
-
-    success_probability: float = 1 - (can_pull / len(deck))
+    return player_probability_busted_counts(deck_to_counts(deck), tuple(hand))
 
-    return success_probability
 
-
-def calculate_win(deck: tuple, hand: tuple, dealer_card: tuple) -> float:
+def _win_probability(counts: tuple, code: int, dealer: tuple) -> float:
     """
-    Calculate the total probability of winning.
+    Calculate the total probability of winning from a rank-count vector and hand code.
 
-    :param deck: Tuple containing the remaining cards in the deck
-    :param hand: Tuple containing the player's current hand
-    :param dealer_card: Tuple containing the dealer's current hand
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param code: The player's hand code as returned by hand_code
+    :param dealer: The dealer's outcome distribution as returned by dealer_distribution
     :return: Probability (0.0-1.0) of winning overall
     """
-    winning_probability: float = 0.0
-
     # First case: Dealer busting
-    busting_probability = dealer_probability_busted(deck=deck, dealer_hand=dealer_card, stand_value=17)
-    winning_probability += busting_probability
+    winning_probability: float = dealer[-1]
 
     # Next cases: Dealer getting from 17 to 21
+    shoe = _shoe(counts)
     for i in range(17, 22):
-        dealer = dealer_probability(deck=deck, dealer_hand=dealer_card, value=i)
+        player = _card_probabilities(*shoe, code, i)
 
-        player = card_probabilities(deck=deck, current_hand=hand, value=i)
-
-        case_probability = dealer * player
+        case_probability = dealer[i - DEALER_STAND_VALUE] * player
         winning_probability += case_probability
 
     return winning_probability
 
 
-def calculate_stand(deck: tuple, hand: tuple, dealer_card: tuple) -> float:
+def _stand_probability(code: int, dealer: tuple) -> float:
     """
-    Calculate the probability of winning if the player stands.
+    Calculate the probability of winning if the player stands on a hand code.
 
-    :param deck: Tuple containing the remaining cards in the deck
-    :param hand: Tuple containing the player's current hand
-    :param dealer_card: Tuple containing the dealer's current hand
+    :param code: The player's hand code as returned by hand_code
+    :param dealer: The dealer's outcome distribution as returned by dealer_distribution
     :return: Probability (0.0-1.0) of winning if the player stands
     """
-    winning_probability: float = 0.0
-
-    hand = list(hand)
-    hand = blackjack(hand)[0]
+    hand = BEST_TOTALS[code]
 
     # First case: Dealer busting
-    busting_probability = dealer_probability_busted(deck=deck, dealer_hand=dealer_card, stand_value=17)
-    winning_probability += busting_probability
+    winning_probability: float = dealer[-1]
 
     # Next cases: From 17 to card, if hand greater than 17
     end_value = hand + 1
     if end_value >= 17:
         for i in range(17, end_value):
-            case_probability = dealer_probability(deck=deck, dealer_hand=dealer_card, value=i)
+            winning_probability += dealer[i - DEALER_STAND_VALUE]
 
-            winning_probability += case_probability
-    # print(f"Dealer busting probability: {busting_probability}")
     return winning_probability
 
 
+def calculate_win(deck: tuple, hand: tuple, dealer_card: tuple) -> float:
+    """
+    Calculate the total probability of winning.
+
+    :param deck: Tuple containing the remaining cards in the deck
+    :param hand: Tuple containing the player's current hand
+    :param dealer_card: Tuple containing the dealer's current hand
+    :return: Probability (0.0-1.0) of winning overall
+    """
+    dealer = dealer_distribution(deck=deck, dealer_hand=dealer_card)
+    return _win_probability(deck_to_counts(deck), hand_code(hand), dealer)
+
+
+def calculate_stand(deck: tuple, hand: tuple, dealer_card: tuple) -> float:
+    """
+    Calculate the probability of winning if the player stands.
+
+    :param deck: Tuple containing the remaining cards in the deck
+    :param hand: Tuple containing the player's current hand
+    :param dealer_card: Tuple containing the dealer's current hand
+    :return: Probability (0.0-1.0) of winning if the player stands
+    """
+    dealer = dealer_distribution(deck=deck, dealer_hand=dealer_card)
+    return _stand_probability(hand_code(hand), dealer)
+
+
 def calculate_hit(deck: tuple, hand: tuple, dealer_card: tuple) -> float:
     """
     Calculate the probability of winning if the player hits.
@@ -291,41 +816,225 @@ def calculate_hit(deck: tuple, hand: tuple, dealer_card: tuple) -> float:
     return win - stand
 
 
-def calculate_all(deck: tuple, hand: tuple, dealer_card: tuple, debug: bool = False) -> tuple[float, float, float]:
+def set_stats_callback(callback, memory: bool = False) -> None:
+    """
+    Profile every calculate_all call and pass its stats to a callback.
+
+    :param callback: Function taking a profiling.CalculationStats, or None to stop profiling
+    :param memory: Whether to trace peak memory, which slows the calculations down (default=False)
+    """
+    global _stats_callback, _stats_memory
+    _stats_callback = callback
+    _stats_memory = memory
+
+
+def calculate_all(deck: tuple, hand: tuple, dealer_card: tuple, debug: bool = False, mode: str = "exact",
+                  time_budget: float = None, tolerance: float = None, rng=None, correction: bool = True):
     """
     Calculate all key probabilities for the current game state.
 
+    mode="exact" runs the exact recursion. mode="sampled" estimates the probabilities by Monte Carlo
+    within the time budget and/or tolerance. mode="auto" predicts the exact engine's cost from the shoe
+    size and hand depth, and samples only when that would exceed the time budget. mode="infinite" uses
+    the closed-form infinite-deck engine, a near-instant first answer on 6+ deck shoes.
+
+    Timings, recursion nodes, depth and cache counters are available through profiling.profile()
+    or set_stats_callback(); debug=True logs them.
+
     :param deck: Tuple containing the remaining cards in the deck
     :param hand: Tuple containing the player's current hand
     :param dealer_card: Tuple containing the dealer's current hand
-    :param debug: Whether to output timing information (default=False)
-    :return: Tuple containing (win probability, stand probability, hit probability)
+    :param debug: Whether to log timing and cache information (default=False)
+    :param mode: "exact", "sampled", "auto" or "infinite" (default="exact")
+    :param time_budget: Latency budget in seconds for "sampled" and "auto" (default=SAMPLE_TIME_BUDGET)
+    :param tolerance: Target standard error for "sampled" and "auto" (default: limited by time only)
+    :param rng: numpy.random.Generator or seed used when sampling (default: freshly seeded)
+    :param correction: Whether "infinite" applies the first-order removal correction (default=True)
+    :return: Tuple containing (win probability, stand probability, hit probability) in "exact" and
+             "infinite" modes, otherwise a sampling.Estimate (win, stand, hit, standard errors, samples)
+             where exact answers have zero errors and zero samples
     """
-    deck = list(deck)
-    hand = list(hand)
-    dealer_hand = list(dealer_card)
+    if mode not in CALCULATION_MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {CALCULATION_MODES}")
+    if not (debug or _stats_callback is not None) or profiling.active() is not None:
+        return _calculate(deck, hand, dealer_card, debug, mode, time_budget, tolerance, rng, correction)
+
+    with profiling.profile(memory=_stats_memory and _stats_callback is not None) as stats:
+        result = _calculate(deck, hand, dealer_card, debug, mode, time_budget, tolerance, rng, correction)
+
+    if debug:
+        for label, seconds in stats.timings.items():
+            logger.debug(f"{label} time: {seconds * 1000}ms")
+        logger.debug(f"recursion nodes: {stats.nodes}, max depth: {stats.max_depth}")
+        for name, info in cache_stats().items():
+            logger.debug(f"{name} cache: {info}")
+        sleep(0.005)
+    if _stats_callback is not None:
+        _stats_callback(stats)
+
+    return result
+
+
+def _calculate(deck: tuple, hand: tuple, dealer_card: tuple, debug: bool, mode: str, time_budget: float,
+               tolerance: float, rng, correction: bool):
+    """Dispatch calculate_all to the engine for its mode."""
+    if mode == "infinite":
+        import infinite  # The NumPy engines (infinite, sampling, batch) are imported on first use
+        return infinite.calculate_all(deck_to_counts(deck), tuple(hand), tuple(dealer_card), correction)
+    if mode != "exact":
+        return _calculate_budgeted(deck, hand, dealer_card, mode, time_budget, tolerance, rng, debug)
 
-    start = time()
-    winning_probability = calculate_win(deck=tuple(deck), hand=tuple(hand), dealer_card=tuple(dealer_hand))
-    end = time()
-    winning_probability_time = end - start
+    deck = tuple(deck)
+    hand = tuple(hand)
+    dealer_hand = tuple(dealer_card)
 
-    start = time()
-    stand = calculate_stand(deck=tuple(deck), hand=tuple(hand), dealer_card=tuple(dealer_hand))
-    end = time()
-    stand_time = end - start
+    start = perf_counter()
+    winning_probability = calculate_win(deck=deck, hand=hand, dealer_card=dealer_hand)
+    profiling.record_timing("win probability", perf_counter() - start)
+
+    start = perf_counter()
+    stand = calculate_stand(deck=deck, hand=hand, dealer_card=dealer_hand)
+    profiling.record_timing("stand", perf_counter() - start)
 
     hit = winning_probability - stand
 
+    return winning_probability, stand, hit
+
+
+def _calculate_budgeted(deck: tuple, hand: tuple, dealer_card: tuple, mode: str, time_budget: float,
+                        tolerance: float, rng, debug: bool):
+    """Sampled and auto modes of calculate_all, returning a sampling.Estimate."""
+    import sampling
+
+    time_budget = SAMPLE_TIME_BUDGET if time_budget is None and tolerance is None else time_budget
+    counts = deck_to_counts(deck)
+    player_state = hand_state(hand)
+    dealer_state = hand_state(dealer_card)
+
+    if mode == "auto":
+        predicted = sampling.estimate_exact_seconds(counts, player_state, dealer_state)
+        if debug:
+            logger.debug(f"predicted exact time: {predicted * 1000}ms")
+        if time_budget is None or predicted <= time_budget:
+            win, stand, hit = _calculate(deck, hand, dealer_card, debug, "exact", None, None, None, False)
+            return sampling.Estimate(win, stand, hit, (0.0, 0.0, 0.0), 0)
+
+    start = perf_counter()
+    estimate = sampling.estimate_all(counts, player_state, dealer_state, time_budget, tolerance, rng)
+    profiling.record_timing("sampling", perf_counter() - start)
     if debug:
-        logging.debug(f"win probability time: {winning_probability_time * 1000}ms")
-        logging.debug(f"stand time: {stand_time * 1000}ms")
-        logging.debug(f"dealer_probability_busted cache info: {dealer_probability_busted.cache_info()}")
-        logging.debug(f"     dealer_probability   cache info: {dealer_probability.cache_info()}")
-        logging.debug(f"     card_probabilities   cache info: {card_probabilities.cache_info()}")
-        sleep(0.005)
+        logger.debug(f"sampled {estimate.samples} hands, errors {estimate.errors}")
+    return estimate
 
-    return winning_probability, stand, hit
+
+@memoize("incremental_engine", maxsize=CACHE_BUDGETS["incremental_engine"], policy=CACHE_POLICY)
+def _engine_probabilities(state: tuple) -> tuple:
+    """Cached evaluation behind IncrementalEngine.probabilities, keyed on an engine state snapshot."""
+    counts, player_counts, dealer_counts = state
+    player_hand = counts_to_deck(player_counts)
+    player_code = hand_code(player_hand)
+    dealer = dealer_distribution_counts(counts, counts_to_deck(dealer_counts))
+
+    win = _win_probability(counts, player_code, dealer)
+    stand = _stand_probability(player_code, dealer)
+    bust = next_card_distribution_counts(counts, player_code)[-1]
+
+    return win, stand, win - stand, bust
+
+
+class IncrementalEngine:
+    """
+    A shoe and the two hands drawn from it, updated one card at a time.
+
+    Every state is evaluated through the shared memo stores, which are keyed on the remaining
+    rank counts and canonical hand states. A card dealt to the player lands on a subtree the
+    player's recursion already visited for the previous state, but the dealer's distribution
+    is keyed on the new shoe and is recomputed on every draw, so a draw costs about as much as
+    a cold calculate_all. Results for recent states are kept, so undoing a draw or returning
+    to an earlier state is a cache hit.
+
+    Attributes:
+        counts (list): Rank counts of the cards remaining in the shoe
+        hands (dict): Rank counts of the "player" and "dealer" hands
+    """
+
+    def __init__(self, deck: tuple, hand: tuple = (), dealer_hand: tuple = ()):
+        """
+        Initialise the engine from a deck and the hands already dealt from it.
+
+        :param deck: Tuple containing the remaining cards in the deck
+        :param hand: Tuple containing the player's current hand
+        :param dealer_hand: Tuple containing the dealer's current hand
+        """
+        self.counts = list(deck_to_counts(deck))
+        self.hands = {"player": list(deck_to_counts(hand)), "dealer": list(deck_to_counts(dealer_hand))}
+
+    def _check(self, card: int, hand: str) -> None:
+        """Raise ValueError for an unknown card or hand, before any state is changed."""
+        if card not in RANKS:
+            raise ValueError(f"Card values must be 2-11, got {card}")
+        if hand is not None and hand not in self.hands:
+            raise ValueError(f"Unknown hand {hand!r}, expected \"player\", \"dealer\" or None")
+
+    def apply_draw(self, card: int, hand: str = None) -> None:
+        """
+        Remove a card from the shoe, optionally dealing it to a hand.
+
+        :param card: The card value drawn (2-11)
+        :param hand: "player", "dealer", or None when the card leaves play (e.g. burnt or discarded)
+        """
+        self._check(card, hand)
+        if self.counts[card - 2] == 0:
+            raise ValueError(f"No {card} left in the shoe")
+        self.counts[card - 2] -= 1
+        if hand is not None:
+            self.hands[hand][card - 2] += 1
+
+    def undo_draw(self, card: int, hand: str = None) -> None:
+        """
+        Return a drawn card to the shoe, optionally taking it back from a hand.
+
+        :param card: The card value returned (2-11)
+        :param hand: "player", "dealer", or None when the card was not dealt to a hand
+        """
+        self._check(card, hand)
+        if hand is not None:
+            if self.hands[hand][card - 2] == 0:
+                raise ValueError(f"No {card} in the {hand} hand")
+            self.hands[hand][card - 2] -= 1
+        self.counts[card - 2] += 1
+
+    @property
+    def state(self) -> tuple:
+        """
+        Immutable snapshot of the shoe and both hands, safe to hand to another thread.
+
+        :return: Tuple of (shoe counts, player counts, dealer counts)
+        """
+        return tuple(self.counts), tuple(self.hands["player"]), tuple(self.hands["dealer"])
+
+    def probabilities(self, state: tuple = None) -> tuple:
+        """
+        Calculate all key probabilities for the current (or a snapshotted) state.
+
+        :param state: A snapshot from the state property (default: the engine's current state)
+        :return: Tuple containing (win probability, stand probability, hit probability, bust probability)
+        """
+        return _engine_probabilities(self.state if state is None else state)
+
+
+def calculate_all_batch(decks, hands, dealer_cards):
+    """
+    Calculate all key probabilities for many game states at once with the vectorised NumPy engine.
+
+    :param decks: Array (N, 10) of rank counts, or a single (10,) shoe shared by every state
+    :param hands: Array (N, 2) or (N, 3) of player hand states as returned by hand_state
+    :param dealer_cards: Array (N,) of dealer upcards (2-11)
+    :return: numpy array (N, 3) of (win probability, stand probability, hit probability)
+    """
+    from batch import calculate_all_batch as _calculate_all_batch
+
+    return _calculate_all_batch(decks, hands, dealer_cards)
 
 
 def calculate_bias(empty_deck: tuple, current_deck: tuple) -> float:
@@ -0,0 +1,92 @@
+"""
+dealer_tables.py : build the precomputed dealer outcome tables loaded by blackjack.py
+
+Enumerates every dealer upcard against the common shoe compositions (a fresh shoe with the
+upcard removed, and with each two-card player hand also removed) and writes the dealer's
+{17..21, bust} distribution for each to a memory-mappable .npy struct array.
+
+Usage: python dealer_tables.py [--decks 1 2 6 8] [--output dealer_tables.npy]
+"""
+
+from itertools import combinations_with_replacement
+from time import time
+
+import argparse
+
+import numpy as np
+
+import blackjack
+
+# Config
+DEFAULT_DECKS = (1, 2, 3, 4, 5, 6, 7, 8)
+TABLE_DTYPE = np.dtype([("counts", "<u2", (len(blackjack.RANKS),)),
+                        ("upcard", "u1"),
+                        ("distribution", "<f8", (len(blackjack.DEALER_OUTCOMES),))])
+
+
+def remove_cards(counts: tuple, cards: tuple) -> tuple:
+    """
+    Remove cards from a rank-count vector.
+
+    :param counts: Tuple of 10 rank counts
+    :param cards: Card values (2-11) to remove
+    :return: Tuple of the remaining counts, or None if a card is not available
+    """
+    remaining = list(counts)
+    for card in cards:
+        remaining[card - 2] -= 1
+        if remaining[card - 2] < 0:
+            return None
+    return tuple(remaining)
+
+
+def shoe_compositions(decks: int, upcard: int):
+    """
+    Generate the common shoe compositions seen with a given upcard.
+
+    :param decks: Number of decks in the shoe
+    :param upcard: The dealer's upcard (2-11)
+    :return: Generator of rank-count tuples
+    """
+    full_shoe = tuple(count * decks for count in blackjack.SINGLE_DECK_COUNTS)
+    yield remove_cards(full_shoe, (upcard,))
+    for player_hand in combinations_with_replacement(blackjack.RANKS, 2):
+        counts = remove_cards(full_shoe, (upcard,) + player_hand)
+        if counts is not None:
+            yield counts
+
+
+def build_dealer_table(deck_counts=DEFAULT_DECKS) -> np.ndarray:
+    """
+    Compute the dealer outcome distribution for every upcard and common shoe composition.
+
+    :param deck_counts: Iterable of shoe sizes (in decks) to include
+    :return: Struct array with counts, upcard and distribution fields
+    """
+    rows = []
+    for decks in deck_counts:
+        for upcard in blackjack.RANKS:
+            for counts in shoe_compositions(decks, upcard):
+                distribution = blackjack.dealer_distribution_counts(counts, (upcard,), use_table=False)
+                rows.append((counts, upcard, distribution))
+        blackjack.clear_caches()  # Compositions never repeat across shoe sizes
+
+    return np.array(rows, dtype=TABLE_DTYPE)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the precomputed dealer outcome tables")
+    parser.add_argument("--decks", type=int, nargs="+", default=list(DEFAULT_DECKS),
+                        help="shoe sizes to include (default: 1-8)")
+    parser.add_argument("--output", default=blackjack.DEALER_TABLE_PATH,
+                        help="path of the .npy file to write (default: %(default)s)")
+    args = parser.parse_args()
+
+    start = time()
+    table = build_dealer_table(args.decks)
+    np.save(args.output, table)
+    print(f"Wrote {len(table)} dealer distributions to {args.output} in {time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+generate_tables.py : generate the per-dealer-card probability tables used by the table analyser
+
+Each dealer card's 100 (card1, card2) cells are independent, so the dealer cards are fanned
+out across a process pool and the results merged into a single CSV file.
+
+Usage: python generate_tables.py [--decks 1] [--workers N] [--output FILE]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from time import time
+
+import argparse
+import csv
+import os
+
+import blackjack
+
+# Config
+DEALER_CARDS = tuple(range(2, 12))
+PLAYER_CARDS = tuple(range(2, 12))
+FIELDNAMES = ['dealer_card', 'card1', 'card2', 'total_prob', 'stand_prob', 'hit_prob', 'bust_prob']
+
+
+def default_output(decks: int) -> str:
+    """
+    Get the default path of the merged table for a shoe size.
+
+    :param decks: Number of decks in the shoe
+    :return: Path of the CSV file
+    """
+    return os.path.join('tables', f"blackjack_probs_{decks}_deck.csv")
+
+
+def create_deck(decks: int) -> list:
+    """
+    Create a shoe of standard 52-card decks represented as values.
+
+    :param decks: Number of decks in the shoe
+    :return: List of card values
+    """
+    return list(blackjack.SINGLE_DECK * decks)
+
+
+def dealer_card_rows(dealer_card: int, decks: int) -> list:
+    """
+    Calculate every (card1, card2) cell for one dealer card.
+
+    :param dealer_card: The dealer's upcard (2-11)
+    :param decks: Number of decks in the shoe
+    :return: List of rows matching FIELDNAMES
+    """
+    deck = create_deck(decks)
+    rows = []
+    shoes = []
+    for card1 in PLAYER_CARDS:
+        for card2 in PLAYER_CARDS:
+            # Calculate remaining deck
+            remaining_deck = deck.copy()
+            remaining_deck.remove(card1)
+            remaining_deck.remove(card2)
+            remaining_deck.remove(dealer_card)
+
+            total_prob, stand_prob, hit_prob = blackjack.calculate_all(tuple(remaining_deck),
+                                                                       (card1, card2),
+                                                                       (dealer_card,))
+            rows.append([dealer_card, card1, card2, total_prob, stand_prob, hit_prob])
+            shoes.append(blackjack.deck_to_counts(remaining_deck))
+
+    # Bust probabilities of all 100 hands in one batched call
+    distributions = blackjack.next_card_distributions(shoes, [(row[1], row[2]) for row in rows])
+    for row, distribution in zip(rows, distributions):
+        row.append(distribution[-1])
+    return rows
+
+
+def generate_tables(decks: int = 1, workers: int = None, output: str = None) -> str:
+    """
+    Generate the merged probability table for every dealer card in parallel.
+
+    :param decks: Number of decks in the shoe (default=1)
+    :param workers: Number of worker processes (default: one per CPU)
+    :param output: Path of the CSV file to write (default: tables/blackjack_probs_<decks>_deck.csv)
+    :return: Path of the written file
+    """
+    output = default_output(decks) if output is None else output
+    directory = os.path.dirname(output)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map keeps the dealer card order, so the merged file is identical for any worker count
+        results = executor.map(dealer_card_rows, DEALER_CARDS, [decks] * len(DEALER_CARDS))
+
+        with open(output, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDNAMES)
+            for rows in results:
+                writer.writerows(rows)
+
+    return output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the per-dealer-card probability tables")
+    parser.add_argument("--decks", type=int, default=1, help="number of decks in the shoe (default: 1)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", default=None,
+                        help="CSV file to write (default: tables/blackjack_probs_<decks>_deck.csv)")
+    args = parser.parse_args()
+
+    start = time()
+    output = generate_tables(decks=args.decks, workers=args.workers, output=args.output)
+    print(f"Generated {output} in {time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
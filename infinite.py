@@ -0,0 +1,120 @@
+"""
+infinite.py : infinite-deck closed-form engine
+
+With an infinite deck every draw has fixed rank probabilities, so a hand is the Markov chain of
+markov.py over hand-code states, and drawing until a stop rule is met is its transition
+matrix raised to markov.MAX_DRAWS. The dealer's outcome table and the player's probability of
+reaching each dealer total are built once, on first use, from the fresh-shoe rank probabilities.
+
+The optional removal correction is first order: the Jacobian of both tables with respect to
+the rank probabilities is precomputed too, and the shift from the fresh-shoe probabilities to
+the current shoe's is applied linearly. A lookup costs a few dot products on 6-8 deck shoes,
+where removal effects are small.
+"""
+
+import numpy as np
+
+import blackjack
+import markov
+
+# Config
+JACOBIAN_STEP = 1e-6  # Central difference step for the removal correction
+
+TARGETS = tuple(range(blackjack.DEALER_STAND_VALUE, 22))
+_OUTCOMES = markov.outcome_matrix()
+
+# Built on first use by _tables()
+_base_probabilities = None
+_dealer_table = None  # (10 upcards, 6 outcomes)
+_reach_table = None  # (states, targets) probability of reaching at least each target
+_dealer_jacobian = None  # (10 upcards, 6 outcomes, 10 ranks)
+_reach_jacobian = None  # (states, targets, 10 ranks)
+
+
+def _solve(probabilities) -> tuple:
+    """Dealer outcome table and player reach table for fixed rank probabilities."""
+    absorbed = markov.absorbed(probabilities, blackjack.DEALER_STAND_VALUE)
+    starts = [blackjack.hand_code((rank,)) for rank in blackjack.RANKS]
+    dealer = absorbed[starts] @ _OUTCOMES
+
+    reach = np.empty((len(markov.STATES), len(TARGETS)))
+    for column, target in enumerate(TARGETS):
+        reach[:, column] = 1.0 - markov.absorbed(probabilities, target)[:len(markov.STATES), markov.BUST]
+    return dealer, reach
+
+
+def _tables() -> None:
+    """Build the fresh-shoe tables and their Jacobians once."""
+    global _base_probabilities, _dealer_table, _reach_table, _dealer_jacobian, _reach_jacobian
+    if _dealer_table is not None:
+        return
+
+    base = np.array(blackjack.SINGLE_DECK_COUNTS, dtype=float) / sum(blackjack.SINGLE_DECK_COUNTS)
+    dealer, reach = _solve(base)
+    dealer_jacobian = np.empty(dealer.shape + (len(base),))
+    reach_jacobian = np.empty(reach.shape + (len(base),))
+    for rank in range(len(base)):
+        step = np.zeros(len(base))
+        step[rank] = JACOBIAN_STEP
+        dealer_up, reach_up = _solve(base + step)
+        dealer_down, reach_down = _solve(base - step)
+        dealer_jacobian[..., rank] = (dealer_up - dealer_down) / (2 * JACOBIAN_STEP)
+        reach_jacobian[..., rank] = (reach_up - reach_down) / (2 * JACOBIAN_STEP)
+
+    _base_probabilities = base
+    _dealer_table, _reach_table = dealer, reach
+    _dealer_jacobian, _reach_jacobian = dealer_jacobian, reach_jacobian
+
+
+def _shift(counts: tuple) -> np.ndarray:
+    """Difference between the current shoe's rank probabilities and the fresh shoe's."""
+    counts = np.asarray(counts, dtype=float)
+    return counts / counts.sum() - _base_probabilities
+
+
+def dealer_distribution(counts: tuple, upcard: int, correction: bool = True) -> np.ndarray:
+    """
+    Calculate the dealer's outcome distribution under the infinite-deck approximation.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param upcard: The dealer's upcard (2-11)
+    :param correction: Whether to apply the first-order removal correction (default=True)
+    :return: Array (6,) ordered as blackjack.DEALER_OUTCOMES
+    """
+    _tables()
+    distribution = _dealer_table[upcard - 2]
+    if correction:
+        distribution = distribution + _dealer_jacobian[upcard - 2] @ _shift(counts)
+    return distribution
+
+
+def calculate_all(counts: tuple, hand: tuple, dealer_card: tuple, correction: bool = True) -> tuple:
+    """
+    Calculate win, stand and hit probabilities under the infinite-deck approximation.
+
+    Uses the same model as blackjack.calculate_all: the player's win probability draws until
+    reaching the dealer's total, and hitting is the difference between winning and standing.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param hand: Tuple containing the player's current hand
+    :param dealer_card: Tuple containing the dealer's upcard
+    :param correction: Whether to apply the first-order removal correction (default=True)
+    :return: Tuple containing (win probability, stand probability, hit probability)
+    """
+    if len(dealer_card) != 1:
+        raise ValueError(f"Expected the dealer's upcard only, got {dealer_card}")
+    _tables()
+
+    code = blackjack.hand_code(hand)
+    dealer = dealer_distribution(counts, dealer_card[0], correction)
+    if code == blackjack.BUST_CODE:
+        reach = np.zeros(len(TARGETS))
+    else:
+        reach = _reach_table[code]
+        if correction:
+            reach = reach + _reach_jacobian[code] @ _shift(counts)
+
+    win = dealer[-1] + dealer[:-1] @ reach
+    total = blackjack.BEST_TOTALS[code]
+    stand = dealer[-1] + sum(probability for target, probability in zip(TARGETS, dealer[:-1]) if target <= total)
+    return float(win), float(stand), float(win - stand)
@@ -6,18 +6,22 @@ import pygame
 import sys
 import random
 import csv
+from collections import namedtuple
 from datetime import datetime
 import os
+import queue
+import threading
+from functools import lru_cache
+from time import perf_counter
 
 import blackjack
 
-# Initialise Pygame
-pygame.init()
+# Fonts are created at import, the window and everything else only by main()
+pygame.font.init()
 
 # Screen dimensions
 WIDTH, HEIGHT = 1250, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Blackjack Probability Calculator")
+screen = None  # The window surface, created by main()
 
 # Colors
 MAIN_BG = (10, 95, 56)  # #0A5F38
@@ -34,6 +38,12 @@ GREYED = (100, 100, 100)  # #646464
 FONT = pygame.font.Font(None, 36)
 SMALL_FONT = pygame.font.Font(None, 24)
 
+# Rendering
+FPS = 60  # Frame-rate cap for the main loop
+DIRTY_RENDERING = True  # Only push changed screen regions to the display, and skip unchanged frames
+RENDER_STATS = False  # Print the card renderer's per-frame blit statistics on exit
+EXPOSE_EVENTS = (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.VIDEOEXPOSE)  # Window contents need a full redraw
+
 # Card dimensions
 CARD_WIDTH, CARD_HEIGHT = 71, 96
 
@@ -51,14 +61,11 @@ BUTTON_HEIGHT = 50
 SMALL_BUTTON_WIDTH = int((BUTTON_WIDTH + 10) / 2)
 BUTTON_SPACING = 10
 
-# Load card images
-card_images = {}
-for i in range(1, 53):
-    filename = f"images/8BitDeck_opt2_{i:02d}.gif"
-    if i in [1, 30]:
-        filename = filename.replace(".gif", ".jpg")
-    card_images[i] = pygame.image.load(filename)
-    card_images[i] = pygame.transform.scale(card_images[i], (CARD_WIDTH, CARD_HEIGHT))
+# Sprite atlas: the spectral deck and the 52 card faces pre-scaled into one image cached on disk
+IMAGE_DIR = "images"
+ATLAS_PATH = os.path.join(IMAGE_DIR, "cache", f"sprite_atlas_{CARD_WIDTH}x{CARD_HEIGHT}.png")
+ATLAS_COLUMNS = 13
+SPECTRAL_DECK = 0  # Sprite index of the spectral deck, card faces are sprites 1-52
 
 # Card slots
 DEALER_SLOTS = [(50 + i * (CARD_WIDTH + 10), 50) for i in range(10)]
@@ -67,38 +74,46 @@ PLAYER_SLOTS = [(50 + i * (CARD_WIDTH + 10), 200) for i in range(10)]
 # Card piles
 PILE_POSITIONS = [(50 + i * (CARD_WIDTH + 10), 400) for i in range(10)]
 
-EMPTY_DECK = (2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 6, 6, 6, 6, 7, 7, 7, 7,
-              8, 8, 8, 8, 9, 9, 9, 9, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10,
-              10, 10, 10, 10, 11, 11, 11, 11)
+EMPTY_DECK = blackjack.counts_to_deck(blackjack.SINGLE_DECK_COUNTS)
 
 # Discard Pile
 DISCARD_PILE_POS = (950, 120)
 DISCARD_PILE_SIZE = (CARD_WIDTH, CARD_HEIGHT)
 
-# Load spectral deck image
-spectral_deck_image = pygame.image.load("images/spectral_deck.png")
-spectral_deck_image = pygame.transform.scale(spectral_deck_image, DISCARD_PILE_SIZE)
-
 # Discard animation constants
 GATHERING_POINT = (590, 150)
 
+# At most one card blit per pile and hand slot, plus the dragged card and the discard pile
+MAX_CARD_BLITS = len(PILE_POSITIONS) + len(DEALER_SLOTS) + len(PLAYER_SLOTS) + 2
+
+# Screen regions tracked for dirty rendering
+HANDS_REGION = pygame.Rect(0, 0, 940, 390)
+PILES_REGION = pygame.Rect(0, 390, 940, HEIGHT - 390)
+PANEL_REGION = pygame.Rect(940, 0, WIDTH - 940, HEIGHT)
+POPUP_REGION = pygame.Rect(DISCARD_PILE_POS[0] - 310, DISCARD_PILE_POS[1], 300, 400)
+
 # Game state
 deck_size = 1
-dealer_hand = []
+dealer_hand = []  # Card objects, card_values() gives their values
 player_hand = []
 discard_pile = []
 deck = list(EMPTY_DECK)
+engine = blackjack.IncrementalEngine(deck)  # Mirrors deck and the hands for incremental calculation
 card_piles = [[] for _ in range(10)]  # 2-9, 10(including J,Q,K), A
 probabilities = {"win": 0.00, "stand": 0.00, "hit": 0.00, "bust": 0.00}
 bias = 0.00
+calculation_requests = queue.Queue()  # (generation, engine state) for the worker thread
+calculation_results = queue.Queue()  # (generation, probabilities) posted back by the worker thread
+calculation_generation = 0  # Bumped by every request, results from older generations are dropped
+computing = False
 dragging = False
-dragged_card = None
-dragged_image = None
+dragged_card = None  # Card taken from a pile while dragging
+show_discard_info = False
 current_pile_suits = [random.randint(0, 3) for _ in range(10)]  # 0: hearts, 1: diamonds, 2: clubs, 3: spades
-card_suits = {}  # This will store the suit for each placed card
-card_face = {}
 ten_pile_face = random.randint(0, 3)  # 0: 10, 1: J, 2: Q, 3: K
 game_log = []
+previous_regions = None  # Region signatures of the last displayed frame, None forces a full redraw
+previous_drag_rect = None
 
 # Button active states
 log_button_active = False
@@ -106,6 +121,240 @@ deck_size_minus_active = False
 deck_size_plus_active = True
 
 
+def sprite_sources() -> list:
+    """
+    List the image file of every sprite, in sprite index order.
+
+    :return: List of file paths
+    """
+    sources = [os.path.join(IMAGE_DIR, "spectral_deck.png")]
+    for i in range(1, 53):
+        extension = "jpg" if i in [1, 30] else "gif"
+        sources.append(os.path.join(IMAGE_DIR, f"8BitDeck_opt2_{i:02d}.{extension}"))
+    return sources
+
+
+def sprite_position(index: int) -> tuple:
+    """
+    Get the top-left corner of a sprite in the atlas.
+
+    :param index: The sprite index
+    :return: A tuple of (x, y) pixel coordinates
+    """
+    return (index % ATLAS_COLUMNS) * CARD_WIDTH, (index // ATLAS_COLUMNS) * CARD_HEIGHT
+
+
+def build_sprite_atlas(sources: list) -> pygame.Surface:
+    """
+    Decode and scale every sprite into one atlas, and cache it at ATLAS_PATH.
+
+    :param sources: Image files as returned by sprite_sources
+    :return: The atlas surface
+    """
+    rows = (len(sources) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+    atlas = pygame.Surface((ATLAS_COLUMNS * CARD_WIDTH, rows * CARD_HEIGHT), pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))  # Transparent where the card images are (e.g. their white color key)
+    for index, source in enumerate(sources):
+        image = pygame.transform.scale(pygame.image.load(source), (CARD_WIDTH, CARD_HEIGHT))
+        atlas.blit(image, sprite_position(index))
+
+    try:
+        os.makedirs(os.path.dirname(ATLAS_PATH), exist_ok=True)
+        pygame.image.save(atlas, ATLAS_PATH)
+    except (OSError, pygame.error) as error:  # Still usable, just rebuilt on the next launch
+        print(f"Could not cache the sprite atlas: {error!r}", file=sys.stderr)
+    return atlas
+
+
+def load_sprite_atlas() -> pygame.Surface:
+    """
+    Load the cached sprite atlas, rebuilding it when missing or older than any source image.
+
+    :return: The atlas surface, converted for fast blitting to the screen
+    """
+    sources = sprite_sources()
+    if os.path.exists(ATLAS_PATH) and os.path.getmtime(ATLAS_PATH) >= max(map(os.path.getmtime, sources)):
+        atlas = pygame.image.load(ATLAS_PATH)
+    else:
+        atlas = build_sprite_atlas(sources)
+    return atlas.convert_alpha()
+
+
+class Card(namedtuple("Card", ["value", "suit", "face"])):
+    """
+    A card on the table, keeping the suit and face it was dealt with wherever it moves.
+
+    Attributes:
+        value (int): The card's blackjack value (2-11)
+        suit (int): 0: hearts, 1: diamonds, 2: clubs, 3: spades
+        face (int): 0: 10, 1: J, 2: Q, 3: K for 10-value cards, 0 for every other card
+    """
+    __slots__ = ()
+
+    @property
+    def sprite(self) -> int:
+        """The index of the card's image in the sprite atlas (1-52)."""
+        if self.value == 11:  # Ace
+            return 13 + self.suit * 13
+        elif self.value == 10:  # 10, J, Q, K
+            return 9 + self.face + self.suit * 13
+        else:
+            return (self.value - 1) + self.suit * 13
+
+
+def card_values(cards: list) -> list:
+    """
+    Get the blackjack values of a list of cards.
+
+    :param cards: List of Card objects
+    :return: List of card values (2-11)
+    """
+    return [card.value for card in cards]
+
+
+def pile_card(pile_index: int) -> Card:
+    """
+    Get the card shown on top of a pile.
+
+    :param pile_index: The pile index (0-7: 2-9, 8: 10/J/Q/K, 9: Ace)
+    :return: The top card, with the pile's current suit and face
+    """
+    return Card(blackjack.RANKS[pile_index], current_pile_suits[pile_index], ten_pile_face if pile_index == 8 else 0)
+
+
+class CardRenderer:
+    """
+    Draws cards from the sprite atlas with a single blit per card.
+
+    Each card is composed onto the white card background and converted to the display format
+    the first time it is drawn, then cached by (value, suit, face). Card blits are counted and
+    timed per frame, and a frame draws at most MAX_CARD_BLITS cards.
+
+    Attributes:
+        atlas (pygame.Surface): The converted sprite atlas, loaded on the first draw
+        surfaces (dict): Card -> composed, opaque card surface
+        blits (int): Card blits in the current frame
+        frame_seconds (float): Time spent blitting cards in the current frame
+        frames (int): Frames finished with end_frame
+        total_blits (int): Card blits over all finished frames
+        max_blits (int): Most card blits in any finished frame
+        seconds (float): Time spent blitting cards over all finished frames
+        max_seconds (float): Longest time spent blitting cards in any finished frame
+    """
+
+    def __init__(self):
+        """
+        Initialise an empty renderer; nothing is loaded until the first draw.
+        """
+        self.atlas = None
+        self.surfaces = {}
+        self.blits = 0
+        self.frame_seconds = 0.0
+        self.frames = 0
+        self.total_blits = 0
+        self.max_blits = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def sprite(self, index: int) -> pygame.Surface:
+        """
+        Get a sprite from the atlas, loading the atlas on first use.
+
+        :param index: SPECTRAL_DECK, or a card image index (1-52)
+        :return: The sprite surface, a view into the atlas
+        """
+        if self.atlas is None:
+            self.atlas = load_sprite_atlas()
+        return self.atlas.subsurface((*sprite_position(index), CARD_WIDTH, CARD_HEIGHT))
+
+    def card_surface(self, card: Card) -> pygame.Surface:
+        """
+        Get the composed surface of a card, building it on first use.
+
+        :param card: The card to draw
+        :return: The card's image on a white background, in the display format
+        """
+        surface = self.surfaces.get(card)
+        if surface is None:
+            surface = pygame.Surface((CARD_WIDTH, CARD_HEIGHT)).convert()
+            surface.fill((255, 255, 255))  # White background
+            surface.blit(self.sprite(card.sprite), (0, 0))
+            self.surfaces[card] = surface
+        return surface
+
+    def draw(self, surface: pygame.Surface, placements) -> None:
+        """
+        Draw cards in one batched blit.
+
+        :param surface: The pygame surface to draw on
+        :param placements: Iterable of (Card, (x, y) top-left position)
+        """
+        sequence = [(self.card_surface(card), position) for card, position in placements]
+        start = perf_counter()
+        surface.blits(sequence, doreturn=False)
+        self.frame_seconds += perf_counter() - start
+        self.blits += len(sequence)
+
+    def draw_sprite(self, surface: pygame.Surface, index: int, position: tuple) -> None:
+        """
+        Draw a sprite as it is in the atlas, keeping its transparency.
+
+        :param surface: The pygame surface to draw on
+        :param index: The sprite index
+        :param position: A tuple of (x, y) coordinates for the top-left corner
+        """
+        sprite = self.sprite(index)
+        start = perf_counter()
+        surface.blit(sprite, position)
+        self.frame_seconds += perf_counter() - start
+        self.blits += 1
+
+    def end_frame(self) -> None:
+        """
+        Finish the current frame's statistics.
+        """
+        self.frames += 1
+        self.total_blits += self.blits
+        self.max_blits = max(self.max_blits, self.blits)
+        self.seconds += self.frame_seconds
+        self.max_seconds = max(self.max_seconds, self.frame_seconds)
+        self.blits = 0
+        self.frame_seconds = 0.0
+
+    def stats(self) -> dict:
+        """
+        Summarise the per-frame blit statistics.
+
+        :return: Dictionary of frames, mean and max blits per frame (with the MAX_CARD_BLITS bound),
+                 and mean and max milliseconds per frame
+        """
+        frames = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "mean_blits": self.total_blits / frames,
+            "max_blits": self.max_blits,
+            "blit_bound": MAX_CARD_BLITS,
+            "mean_ms": self.seconds / frames * 1000,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+renderer = CardRenderer()
+
+
+@lru_cache(maxsize=512)
+def render_text(font: pygame.font.Font, text: str, color: tuple) -> pygame.Surface:
+    """
+    Render antialiased text, reusing the surface until the text or color changes.
+
+    :param font: The pygame font to render with
+    :param text: The text to render
+    :param color: The RGB text color
+    :return: The rendered text surface
+    """
+    return font.render(text, True, color)
+
+
 def draw_percentage_bars() -> None:
     """
     Draw visual bars representing the probability of winning when standing vs hitting.
@@ -135,15 +384,15 @@ def draw_percentage_bars() -> None:
     pygame.draw.rect(screen, (255, 255, 255), (BAR_X, BAR_Y, BAR_WIDTH, BAR_HEIGHT), 2)
 
     # Add text labels
-    font = pygame.font.Font(None, 24)  # You can adjust the font size as needed
+    font = SMALL_FONT
 
     # Stand label
-    stand_text = font.render("Stand", True, (255, 255, 255))
+    stand_text = render_text(font, "Stand", (255, 255, 255))
     stand_text_rect = stand_text.get_rect(topleft=(BAR_X, BAR_Y + BAR_HEIGHT + 5))
     screen.blit(stand_text, stand_text_rect)
 
     # Hit label
-    hit_text = font.render("Hit", True, (255, 255, 255))
+    hit_text = render_text(font, "Hit", (255, 255, 255))
     hit_text_rect = hit_text.get_rect(topright=(BAR_X + BAR_WIDTH, BAR_Y + BAR_HEIGHT + 5))
     screen.blit(hit_text, hit_text_rect)
 
@@ -155,7 +404,7 @@ def render_deck_size_text() -> None:
     Renders the text showing the number of decks in play and centers it
     at a predefined position.
     """
-    deck_size_text = FONT.render(f"Deck Size: {deck_size}", True, TEXT)
+    deck_size_text = render_text(FONT, f"Deck Size: {deck_size}", TEXT)
     deck_size_text_rect = deck_size_text.get_rect(center=(1085, 75))
     screen.blit(deck_size_text, deck_size_text_rect)
 
@@ -172,18 +421,6 @@ def update_bias() -> None:
     bias = blackjack.calculate_bias(full_deck, tuple(deck))
 
 
-def draw_card_background(surface: pygame.Surface, position: tuple) -> None:
-    """
-    Draw a white background for a card at the specified position.
-
-    :param surface: The pygame surface to draw on
-    :param position: A tuple of (x, y) coordinates for the top-left corner
-    """
-    card_bg = pygame.Surface((CARD_WIDTH, CARD_HEIGHT))
-    card_bg.fill((255, 255, 255))  # White background
-    surface.blit(card_bg, position)
-
-
 def initialise_card_piles() -> None:
     """
     Initialise all card piles with the appropriate cards from the deck.
@@ -194,9 +431,10 @@ def initialise_card_piles() -> None:
     - Pile 9: Aces
     Also assigns random suits to each pile.
     """
-    global card_piles, deck, current_pile_suits
+    global card_piles, deck, engine, current_pile_suits
     card_piles = [[] for _ in range(10)]
     deck = list(EMPTY_DECK) * deck_size
+    engine = blackjack.IncrementalEngine(deck)
     for card in deck:
         if card == 11:  # Ace
             card_piles[9].append(card)
@@ -214,22 +452,27 @@ def draw_card_piles() -> None:
     Displays each pile with appropriate card images, shows the count of
     cards in each pile, and handles the special cases of face cards and aces.
     """
-    global ten_pile_face
+    renderer.draw(screen, [(pile_card(j), PILE_POSITIONS[j]) for j, pile in enumerate(card_piles) if pile])
     for j, pile in enumerate(card_piles):
-        if pile:
-            suit = current_pile_suits[j]
-            draw_card_background(screen, PILE_POSITIONS[j])
-            if j == 8:  # 10, J, Q, K pile
-                screen.blit(card_images[9 + ten_pile_face + suit * 13], PILE_POSITIONS[j])
-            elif j == 9:  # Ace pile
-                screen.blit(card_images[13 + suit * 13], PILE_POSITIONS[j])
-            else:
-                screen.blit(card_images[j + 1 + suit * 13], PILE_POSITIONS[j])
         pygame.draw.rect(screen, BORDER, (*PILE_POSITIONS[j], CARD_WIDTH, CARD_HEIGHT), 2)
-        count = SMALL_FONT.render(str(len(pile)), True, TEXT)
+        count = render_text(SMALL_FONT, str(len(pile)), TEXT)
         screen.blit(count, (PILE_POSITIONS[j][0] + 5, PILE_POSITIONS[j][1] + CARD_HEIGHT + 5))
 
 
+def hand_value_label(hand: list) -> str:
+    """
+    Format a hand's value for the slot labels.
+
+    :param hand: List of cards in the hand
+    :return: "BUST", "Value: 17" or "Value: 17/7" for a soft hand
+    """
+    code = blackjack.hand_code(hand)
+    if code == blackjack.BUST_CODE:
+        return "BUST"
+    best, hard = blackjack.BEST_TOTALS[code], blackjack.HARD_TOTALS[code]
+    return f"Value: {best}/{hard}" if best != hard else f"Value: {best}"
+
+
 def draw_slots() -> None:
     """
     Draw the card slots for both dealer and player hands.
@@ -241,40 +484,24 @@ def draw_slots() -> None:
     for slots in DEALER_SLOTS + PLAYER_SLOTS:
         pygame.draw.rect(screen, BORDER, (*slots, CARD_WIDTH, CARD_HEIGHT), 2)
 
-    font = pygame.font.Font(None, 24)  # You can adjust the font size as needed
+    font = SMALL_FONT
 
     # Dealer label and value
-    dealer_label = font.render("Dealer", True, TEXT)
+    dealer_label = render_text(font, "Dealer", TEXT)
     dealer_label_rect = dealer_label.get_rect(topleft=(10, 10))  # Position in the top-left corner (red circle area)
     screen.blit(dealer_label, dealer_label_rect)
 
-    dealer_value = blackjack.blackjack(dealer_hand)
-    if len(dealer_value) == 2 or dealer_value[0] == 0:
-        if dealer_value[0] == dealer_value[1]:
-            dealer_value = dealer_value[0]
-        else:
-            dealer_value = str(dealer_value[0]) + "/" + str(dealer_value[1])
-    else:
-        dealer_value = str(dealer_value[0])
-    dealer_value_text = font.render(f"Value: {dealer_value}" if dealer_value != 1 else "BUST", True, TEXT)
+    dealer_value_text = render_text(font, hand_value_label(card_values(dealer_hand)), TEXT)
     dealer_value_rect = dealer_value_text.get_rect(topleft=(dealer_label_rect.right + 10, dealer_label_rect.top))
     screen.blit(dealer_value_text, dealer_value_rect)
 
     # Player label and value
-    player_label = font.render("Player", True, TEXT)
+    player_label = render_text(font, "Player", TEXT)
     player_label_rect = player_label.get_rect(
         bottomleft=(10, PLAYER_SLOTS[0][1] - 10))  # Position above the player slots (black circle area)
     screen.blit(player_label, player_label_rect)
 
-    player_value = blackjack.blackjack(player_hand)
-    if len(player_value) == 2 or player_value[0] == 0:
-        if player_value[0] == player_value[1]:
-            player_value = player_value[0]
-        else:
-            player_value = str(player_value[0]) + "/" + str(player_value[1])
-    else:
-        player_value = str(player_value[0])
-    player_value_text = font.render(f"Value: {player_value}" if player_value != 1 else "BUST", True, TEXT)
+    player_value_text = render_text(font, hand_value_label(card_values(player_hand)), TEXT)
     player_value_rect = player_value_text.get_rect(bottomleft=(player_label_rect.right + 10, player_label_rect.bottom))
     screen.blit(player_value_text, player_value_rect)
 
@@ -283,57 +510,9 @@ def draw_hands() -> None:
     """
     Draw all cards in both the dealer's and player's hands.
 
-    Renders the appropriate card images in their respective slots based on
-    the current state of the hands.
+    Renders each card in its slot with the suit and face it was dealt with.
     """
-    for i, card in enumerate(dealer_hand):
-        draw_card_background(screen, DEALER_SLOTS[i])
-        card_image = get_card_image(card, dealer_hand, i)
-        screen.blit(card_images[card_image], DEALER_SLOTS[i])
-    for i, card in enumerate(player_hand):
-        draw_card_background(screen, PLAYER_SLOTS[i])
-        card_image = get_card_image(card, player_hand, i)
-        screen.blit(card_images[card_image], PLAYER_SLOTS[i])
-
-
-def get_card_image(card_value: int, hand: list = None, index: int = None) -> int:
-    """
-    Determine the appropriate card image for a given card value.
-
-    :param card_value: The numerical value of the card (2-11)
-    :param hand: The hand the card belongs to (None if dragging)
-    :param index: The position in the hand (None if dragging)
-    :return: The index of the card image to display
-
-    This function handles suit consistency and special cases for face cards
-    and aces, ensuring the same card always has the same appearance.
-    """
-    global card_face
-    if hand is None or index is None:  # For dragging or discarding
-        suit = random.randint(0, 3)
-        if card_value == 11:  # Ace
-            return 13 + suit * 13
-        elif card_value == 10:  # 10, J, Q, K
-            face = random.randint(0, 3)
-            return 9 + face + suit * 13
-        else:
-            return (card_value - 1) + suit * 13
-
-    if (card_value, id(hand), index) in card_suits:
-        suit = card_suits[(card_value, id(hand), index)]
-    else:
-        suit = random.randint(0, 3)
-        card_suits[(card_value, id(hand), index)] = suit
-
-    if card_value == 11:  # Ace
-        return 13 + suit * 13
-    elif card_value == 10:  # 10, J, Q, K
-        if (card_value, id(hand), index) not in card_face:
-            card_face[(card_value, id(hand), index)] = random.randint(0, 3)
-        face = card_face[(card_value, id(hand), index)]
-        return 9 + face + suit * 13
-    else:
-        return (card_value - 1) + suit * 13
+    renderer.draw(screen, list(zip(dealer_hand, DEALER_SLOTS)) + list(zip(player_hand, PLAYER_SLOTS)))
 
 
 def draw_probabilities() -> None:
@@ -343,13 +522,16 @@ def draw_probabilities() -> None:
     Shows the win probability, stand probability, hit probability, deck bias,
     and bust probability in a formatted text display.
     """
-    win_text = FONT.render(f"Win: {probabilities['win']:.2%}", True, TEXT)
-    stand_text = FONT.render(f"Stand: {probabilities['stand']:.2%}", True, TEXT)
-    hit_text = FONT.render(f"Hit: {probabilities['hit']:.2%}", True, TEXT)
-    bias_text = FONT.render(f"Bias: {bias:.2f}", True, TEXT)
-    bust_text = FONT.render(f"Bust: {probabilities['bust']:.2%}", True, TEXT)
+    win_text = render_text(FONT, f"Win: {probabilities['win']:.2%}", TEXT)
+    stand_text = render_text(FONT, f"Stand: {probabilities['stand']:.2%}", TEXT)
+    hit_text = render_text(FONT, f"Hit: {probabilities['hit']:.2%}", TEXT)
+    bias_text = render_text(FONT, f"Bias: {bias:.2f}", TEXT)
+    bust_text = render_text(FONT, f"Bust: {probabilities['bust']:.2%}", TEXT)
 
     screen.blit(win_text, (950, 300))
+    if computing:
+        computing_text = render_text(SMALL_FONT, "Computing...", ACCENT)
+        screen.blit(computing_text, (1110, 305))
     screen.blit(stand_text, (950, 340))
     screen.blit(hit_text, (950, 380))
     screen.blit(bias_text, (950, 420))
@@ -363,22 +545,22 @@ def draw_buttons() -> None:
     Renders each button with its text label at the appropriate position.
     """
     pygame.draw.rect(screen, ACCENT, reset_button)
-    reset_text = FONT.render("Reset", True, TEXT)
+    reset_text = render_text(FONT, "Reset", TEXT)
     screen.blit(reset_text, (reset_button.x + 60, reset_button.y + 10))
 
     pygame.draw.rect(screen, ACCENT, calculate_button)
-    calculate_text = FONT.render("Calculate", True, TEXT)
+    calculate_text = render_text(FONT, "Calculate", TEXT)
     screen.blit(calculate_text, (calculate_button.x + 40, calculate_button.y + 10))
 
     pygame.draw.rect(screen, ACCENT, deck_size_minus_button)
     pygame.draw.rect(screen, ACCENT, deck_size_plus_button)
-    minus_text = FONT.render("-", True, TEXT)
-    plus_text = FONT.render("+", True, TEXT)
+    minus_text = render_text(FONT, "-", TEXT)
+    plus_text = render_text(FONT, "+", TEXT)
     screen.blit(minus_text, (deck_size_minus_button.x + 20, deck_size_minus_button.y + 10))
     screen.blit(plus_text, (deck_size_plus_button.x + 20, deck_size_plus_button.y + 10))
 
     pygame.draw.rect(screen, ACCENT, discard_button)
-    discard_text = FONT.render("Discard All", True, TEXT)
+    discard_text = render_text(FONT, "Discard All", TEXT)
     screen.blit(discard_text, (discard_button.x + 30, discard_button.y + 10))
 
 
@@ -404,27 +586,82 @@ def card_to_value(card: int) -> str:
 
 def calculate_probabilities() -> None:
     """
-    Calculate probabilities for the current game state.
+    Request probabilities for the current game state from the calculation worker.
 
-    Uses the imported blackjack module to calculate:
+    The worker thread evaluates a snapshot of the incremental engine to calculate:
     - Win probability
     - Stand probability
     - Hit probability
     - Bust probability
-    - Deck bias
+    The deck bias is updated immediately. A new request supersedes any calculation still in flight.
 
     Only calculates if both dealer and player have cards.
     """
-    global probabilities, bias, deck
+    global probabilities, bias, calculation_generation, computing
+    calculation_generation += 1
     if dealer_hand and player_hand:
-        probabilities["win"], probabilities["stand"], probabilities["hit"] = blackjack.calculate_all(tuple(deck),
-                                                                                                     tuple(player_hand),
-                                                                                                     tuple(dealer_hand))
+        calculation_requests.put((calculation_generation, engine.state))
+        computing = True
         bias = blackjack.calculate_bias(EMPTY_DECK, tuple(deck))
-        probabilities["bust"] = blackjack.player_probability_busted(tuple(deck), tuple(player_hand))
     else:
         probabilities = {"win": 0.00, "stand": 0.00, "hit": 0.00, "bust": 0.00}
         bias = 0.00
+        computing = False
+
+
+def cancel_calculation() -> None:
+    """
+    Discard the result of any calculation still in flight.
+    """
+    global calculation_generation, computing
+    calculation_generation += 1
+    computing = False
+
+
+def calculation_worker() -> None:
+    """
+    Run requested probability calculations on a background thread.
+
+    Only the newest pending request is calculated, older ones are skipped. Results are
+    posted to calculation_results for the main loop to collect.
+    """
+    while True:
+        request = calculation_requests.get()
+        try:
+            while True:  # Skip to the newest request
+                request = calculation_requests.get_nowait()
+        except queue.Empty:
+            pass
+
+        generation, state = request
+        if generation != calculation_generation:  # Superseded while waiting
+            continue
+
+        try:
+            win, stand, hit, bust = engine.probabilities(state)
+            result = {"win": win, "stand": stand, "hit": hit, "bust": bust}
+        except Exception as error:
+            print(f"Calculation failed: {error!r}", file=sys.stderr)
+            result = None
+        calculation_results.put((generation, result))
+
+
+def collect_probabilities() -> None:
+    """
+    Apply finished calculations from the worker thread.
+
+    Results from superseded requests are dropped.
+    """
+    global probabilities, computing
+    while True:
+        try:
+            generation, result = calculation_results.get_nowait()
+        except queue.Empty:
+            return
+        if generation == calculation_generation:
+            if result is not None:
+                probabilities = result
+            computing = False
 
 
 def reset_game() -> None:
@@ -436,13 +673,12 @@ def reset_game() -> None:
     and updates the bias value.
     """
     global dealer_hand, player_hand, discard_pile, probabilities, bias, deck, \
-        card_suits, card_face, ten_pile_face, game_log, log_button_active
+        ten_pile_face, game_log, log_button_active
     dealer_hand = []
     player_hand = []
     discard_pile = []
     probabilities = {"win": 0.00, "stand": 0.00, "hit": 0.00, "bust": 0.00}
-    card_suits.clear()
-    card_face.clear()
+    cancel_calculation()
     ten_pile_face = random.randint(0, 3)
     initialise_card_piles()
     update_bias()
@@ -480,27 +716,30 @@ def discard_all_cards() -> None:
     Discard all cards from dealer and player hands.
 
     Adds the current hands to the game log, moves all cards to the discard pile,
-    clears the hands, animates the discard process, and updates the bias.
+    clears the hands and their probabilities, animates the discard process, and updates the bias.
     """
-    global dealer_hand, player_hand, discard_pile, card_suits, game_log, log_button_active
+    global dealer_hand, player_hand, discard_pile, probabilities, engine, game_log, log_button_active
     cards_to_discard = dealer_hand + player_hand
     if cards_to_discard:
         game_log.append({
-            'dealer_hand': dealer_hand.copy(),
-            'player_hand': player_hand.copy(),
-            'dealer_sum': blackjack.blackjack(dealer_hand),
-            'player_sum': blackjack.blackjack(player_hand),
+            'dealer_hand': card_values(dealer_hand),
+            'player_hand': card_values(player_hand),
+            'dealer_sum': blackjack.blackjack(card_values(dealer_hand)),
+            'player_sum': blackjack.blackjack(card_values(player_hand)),
         })
         log_button_active = True
         log_button.enabled = True
     # print(f"Cards being discarded: {cards_to_discard}")  # Debug print
     if cards_to_discard:  # Only animate and discard if there are cards to discard
-        discard_pile.extend(cards_to_discard)
+        discard_pile.extend(card_values(cards_to_discard))
         dealer_hand = []
         player_hand = []
+        probabilities = {"win": 0.00, "stand": 0.00, "hit": 0.00, "bust": 0.00}
+        cancel_calculation()  # A result still in flight belongs to the discarded hands
+        engine = blackjack.IncrementalEngine(deck)  # Discarded cards stay out of the shoe
         animate_discard(cards_to_discard)
-        card_suits.clear()
         update_bias()
+        invalidate_screen()
     # print(f"Discard pile after discard: {discard_pile}")  # Debug print
 
 
@@ -527,11 +766,11 @@ def draw_discard_pile() -> None:
     cards in the discard pile.
     """
     if discard_pile:
-        screen.blit(spectral_deck_image, DISCARD_PILE_POS)
+        renderer.draw_sprite(screen, SPECTRAL_DECK, DISCARD_PILE_POS)
     else:
         pygame.draw.rect(screen, BORDER, (*DISCARD_PILE_POS, *DISCARD_PILE_SIZE), 2)
 
-    count = SMALL_FONT.render(str(len(discard_pile)), True, TEXT)
+    count = render_text(SMALL_FONT, str(len(discard_pile)), TEXT)
     screen.blit(count, (DISCARD_PILE_POS[0] + 5, DISCARD_PILE_POS[1] + CARD_HEIGHT + 5))
 
 
@@ -548,7 +787,7 @@ def show_discard_popup() -> None:
     pygame.draw.rect(screen, SECONDARY_BG, (popup_x, popup_y, popup_width, popup_height))
     pygame.draw.rect(screen, BORDER, (popup_x, popup_y, popup_width, popup_height), 2)
 
-    title = FONT.render("Discarded Cards", True, TEXT)
+    title = render_text(FONT, "Discarded Cards", TEXT)
     screen.blit(title, (popup_x + 10, popup_y + 10))
 
     # Count the occurrences of each card value
@@ -559,7 +798,7 @@ def show_discard_popup() -> None:
     y_offset = 50
     for card_value, count in card_counts.items():
         if count > 0:
-            card_text = SMALL_FONT.render(f"{card_to_value(card_value)}: {count}", True, TEXT)
+            card_text = render_text(SMALL_FONT, f"{card_to_value(card_value)}: {count}", TEXT)
             screen.blit(card_text, (popup_x + 10, popup_y + y_offset))
             y_offset += 30
         if y_offset > popup_height - 30:
@@ -570,7 +809,7 @@ def animate_discard(cards_to_discard: list) -> None:
     """
     Animate the process of discarding cards.
 
-    :param cards_to_discard: A list of cards to be discarded
+    :param cards_to_discard: A list of Card objects to be discarded
 
     Creates a smooth animation of cards moving from their positions
     to a gathering point and then to the discard pile.
@@ -584,8 +823,6 @@ def animate_discard(cards_to_discard: list) -> None:
     discard_duration = 1000  # milliseconds for discarding phase
     start_time = pygame.time.get_ticks()
 
-    card_images_to_discard = [get_card_image(card, None, None) for card in cards_to_discard]
-
     # Ensure we have a starting position for each card
     while len(start_positions) < len(cards_to_discard):
         start_positions.append(start_positions[-1])
@@ -602,7 +839,8 @@ def animate_discard(cards_to_discard: list) -> None:
         render_deck_size_text()
         draw_discard_pile()
 
-        for i, card_image in enumerate(card_images_to_discard):
+        placements = []
+        for i, card in enumerate(cards_to_discard):
             start_pos = start_positions[i]
 
             if current_time < gather_duration:
@@ -620,18 +858,12 @@ def animate_discard(cards_to_discard: list) -> None:
                     GATHERING_POINT[1] + (end_position[1] - GATHERING_POINT[1]) * progress
                 )
 
-            # Create a white background surface
-            bg_surface = pygame.Surface((CARD_WIDTH, CARD_HEIGHT))
-            bg_surface.fill((255, 255, 255))  # White color
-
-            # Calculate the position to blit the surfaces
-            bg_rect = bg_surface.get_rect(center=current_pos)
-            card_rect = card_images[card_image].get_rect(center=current_pos)
-
-            # Blit the white background and then the card
-            screen.blit(bg_surface, bg_rect)
-            screen.blit(card_images[card_image], card_rect)
+            card_rect = pygame.Rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
+            card_rect.center = current_pos
+            placements.append((card, card_rect.topleft))
 
+        renderer.draw(screen, placements)
+        renderer.end_frame()
         pygame.display.flip()
         clock.tick(60)
 
@@ -645,6 +877,7 @@ def animate_discard(cards_to_discard: list) -> None:
         button.draw(screen)
     render_deck_size_text()
     draw_discard_pile()
+    renderer.end_frame()
     pygame.display.flip()
 
 
@@ -677,8 +910,8 @@ def show_popup(message: str) -> None:
 
     Creates a popup with the given message and displays it for 2 seconds.
     """
-    popup_font = pygame.font.Font(None, 24)
-    popup_text = popup_font.render(message, True, TEXT)
+    popup_font = SMALL_FONT
+    popup_text = render_text(popup_font, message, TEXT)
     popup_rect = popup_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
 
     popup_bg = pygame.Surface((popup_rect.width + 20, popup_rect.height + 20))
@@ -690,6 +923,7 @@ def show_popup(message: str) -> None:
     pygame.display.flip()
 
     pygame.time.wait(2000)  # Show the popup for 2 seconds
+    invalidate_screen()
 
 
 def log_game() -> None:
@@ -726,6 +960,92 @@ def log_game() -> None:
     log_button.reset_state()
 
 
+def draw_scene() -> None:
+    """
+    Draw the complete scene to the screen surface.
+
+    Includes the dragged card and the discard popup when they are active.
+    """
+    screen.fill(MAIN_BG)
+    draw_card_piles()
+    draw_slots()
+    draw_hands()
+    draw_probabilities()
+    draw_percentage_bars()
+    for button in buttons:
+        button.draw(screen)
+    render_deck_size_text()
+    draw_discard_pile()
+
+    if dragging and dragged_card:
+        mouse_pos = pygame.mouse.get_pos()
+        drag_pos = (mouse_pos[0] - CARD_WIDTH // 2, mouse_pos[1] - CARD_HEIGHT // 2)
+        renderer.draw(screen, [(dragged_card, drag_pos)])
+
+    if show_discard_info:
+        show_discard_popup()
+
+
+def scene_regions() -> dict:
+    """
+    Describe what each screen region currently shows.
+
+    :return: Dictionary of region name to (rect, signature); a region is dirty when its signature changes
+    """
+    return {
+        "hands": (HANDS_REGION, (tuple(dealer_hand), tuple(player_hand))),
+        "piles": (PILES_REGION, (tuple(len(pile) for pile in card_piles), tuple(current_pile_suits),
+                                 ten_pile_face)),
+        "panel": (PANEL_REGION, (tuple(probabilities.values()), bias, computing, deck_size, len(discard_pile),
+                                 tuple((button.is_hovered, button.is_clicked, button.enabled) for button in buttons))),
+        "popup": (POPUP_REGION, (show_discard_info, len(discard_pile))),
+    }
+
+
+def invalidate_screen() -> None:
+    """
+    Force the next frame to redraw and display the whole screen.
+
+    Used after anything draws outside of render_frame, such as animations and popups.
+    """
+    global previous_regions
+    previous_regions = None
+
+
+def render_frame() -> None:
+    """
+    Draw the scene and push it to the display.
+
+    With DIRTY_RENDERING, frames where nothing changed are skipped entirely and only the
+    regions that changed (plus the old and new dragged card positions) are updated. main()
+    calls invalidate_screen() when the window is exposed or restored, forcing a full redraw.
+    """
+    global previous_regions, previous_drag_rect
+    regions = scene_regions()
+    drag_rect = None
+    if dragging and dragged_card:
+        drag_rect = pygame.Rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
+        drag_rect.center = pygame.mouse.get_pos()
+
+    dirty = None
+    if DIRTY_RENDERING and previous_regions is not None:
+        dirty = [rect for name, (rect, signature) in regions.items() if previous_regions[name][1] != signature]
+        if drag_rect != previous_drag_rect:
+            dirty.extend(rect for rect in (drag_rect, previous_drag_rect) if rect is not None)
+        if not dirty:
+            return
+
+    draw_scene()
+    renderer.end_frame()
+    if dirty is None:
+        pygame.display.flip()
+    else:
+        pygame.display.update(dirty)
+
+    previous_regions = regions
+    previous_drag_rect = drag_rect
+
+
 class Button:
     """
     A class to represent an interactive button in the game.
@@ -794,7 +1114,7 @@ class Button:
             y_offset = self.hover_offset
 
         pygame.draw.rect(surface, color, (self.rect.x, self.rect.y + y_offset, self.rect.width, self.rect.height))
-        text_surf = self.font.render(self.text, True, text_color)
+        text_surf = render_text(self.font, self.text, text_color)
         text_rect = text_surf.get_rect(center=self.rect.center)
         text_rect.y += y_offset
         surface.blit(text_surf, text_rect)
@@ -845,131 +1165,115 @@ deck_size_plus_button = Button(1170, 50, 50, 50, "+", FONT, lambda: change_deck_
 
 buttons = [calculate_button, deck_size_minus_button, deck_size_plus_button, discard_button, reset_button, log_button]
 
-# Main game loop
-running = True
-initialise_card_piles()
-show_discard_info = False
-previous_suit = None
-dragged_face = None
 
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def main() -> None:
+    """
+    Open the window and run the main game loop until it is closed.
+    """
+    global screen, dragging, dragged_card, ten_pile_face, show_discard_info
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Blackjack Probability Calculator")
 
-        for button in buttons:
-            button.handle_event(event)
-
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # Left mouse button
-                if pygame.Rect(*DISCARD_PILE_POS, *DISCARD_PILE_SIZE).collidepoint(event.pos):
-                    show_discard_info = True
-                else:
-                    # Check if a dealer slot was clicked
+    clock = pygame.time.Clock()
+    running = True
+    initialise_card_piles()
+    threading.Thread(target=calculation_worker, name="calculation-worker", daemon=True).start()
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type in EXPOSE_EVENTS:  # Uncovered or restored: skipped frames left nothing to show
+                invalidate_screen()
+
+            for button in buttons:
+                button.handle_event(event)
+
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:  # Left mouse button
+                    if pygame.Rect(*DISCARD_PILE_POS, *DISCARD_PILE_SIZE).collidepoint(event.pos):
+                        show_discard_info = True
+                    else:
+                        # Check if a dealer slot was clicked
+                        for i, slot in enumerate(DEALER_SLOTS):
+                            if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos) and i < len(dealer_hand):
+                                card_to_return = dealer_hand.pop(i)
+                                engine.undo_draw(card_to_return.value, "dealer")
+                                return_card_to_original_pile(card_to_return.value)
+                                update_bias()
+                                calculate_probabilities()
+                                break
+
+                        # Check if a player slot was clicked
+                        for i, slot in enumerate(PLAYER_SLOTS):
+                            if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos) and i < len(player_hand):
+                                card_to_return = player_hand.pop(i)
+                                engine.undo_draw(card_to_return.value, "player")
+                                return_card_to_original_pile(card_to_return.value)
+                                update_bias()
+                                calculate_probabilities()
+                                break
+
+                        # Check if a pile was clicked (for dragging)
+                        for i, pile_pos in enumerate(PILE_POSITIONS):
+                            if pygame.Rect(*pile_pos, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos) and card_piles[i]:
+                                dragging = True
+                                dragged_card = pile_card(i)  # Keeps the pile's suit and face
+                                deck.remove(dragged_card.value)
+                                card_piles[i].pop()
+                                current_pile_suits[i] = random.randint(0, 3)
+                                if i == 8:  # If we took from the 10's pile, change its face
+                                    ten_pile_face = random.randint(0, 3)
+                                update_bias()
+                                break
+
+                    # Handle log button click
+                    if log_button.rect.collidepoint(event.pos) and log_button_active:
+                        log_game()
+
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1 and dragging:
+                    card_placed = False
                     for i, slot in enumerate(DEALER_SLOTS):
-                        if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos) and i < len(dealer_hand):
-                            card_to_return = dealer_hand.pop(i)
-                            return_card_to_original_pile(card_to_return)
-                            # Remove the card's suit and face information
-                            card_suits = {k: v for k, v in card_suits.items() if k[1] != id(dealer_hand) or k[2] != i}
-                            card_face = {k: v for k, v in card_face.items() if k[1] != id(dealer_hand) or k[2] != i}
+                        if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos):
+                            dealer_hand.append(dragged_card)
+                            engine.apply_draw(dragged_card.value, "dealer")
+                            card_placed = True
                             update_bias()
                             break
-
-                    # Check if a player slot was clicked
                     for i, slot in enumerate(PLAYER_SLOTS):
-                        if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos) and i < len(player_hand):
-                            card_to_return = player_hand.pop(i)
-                            return_card_to_original_pile(card_to_return)
-                            # Remove the card's suit and face information
-                            card_suits = {k: v for k, v in card_suits.items() if k[1] != id(player_hand) or k[2] != i}
-                            card_face = {k: v for k, v in card_face.items() if k[1] != id(player_hand) or k[2] != i}
+                        if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos):
+                            player_hand.append(dragged_card)
+                            engine.apply_draw(dragged_card.value, "player")
+                            card_placed = True
                             update_bias()
                             break
 
-                    # Check if a pile was clicked (for dragging)
-                    for i, pile_pos in enumerate(PILE_POSITIONS):
-                        if pygame.Rect(*pile_pos, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos) and card_piles[i]:
-                            dragging = True
-                            if i == 8:  # 10, J, Q, K pile
-                                dragged_card = 10
-                                dragged_face = ten_pile_face
-                                dragged_image = 9 + dragged_face + current_pile_suits[i] * 13
-                            elif i == 9:  # Ace pile
-                                dragged_card = 11
-                                dragged_image = 13 + current_pile_suits[i] * 13
-                            else:
-                                dragged_card = i + 2  # Correct card value (2-9)
-                                dragged_image = i + 1 + current_pile_suits[i] * 13
-                            deck.remove(dragged_card)
-                            card_piles[i].pop()
-                            previous_suit = current_pile_suits[i]
-                            current_pile_suits[i] = random.randint(0, 3)
-                            if i == 8:  # If we took from the 10's pile, change its face
-                                ten_pile_face = random.randint(0, 3)
-                            update_bias()
-                            break
-
-                # Handle log button click
-                if log_button.rect.collidepoint(event.pos) and log_button_active:
-                    log_game()
-
-        elif event.type == pygame.MOUSEBUTTONUP:
-            if event.button == 1 and dragging:
-                card_placed = False
-                for i, slot in enumerate(DEALER_SLOTS):
-                    if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos):
-                        dealer_hand.append(dragged_card)
-                        card_suits[(dragged_card, id(dealer_hand), len(dealer_hand) - 1)] = previous_suit
-                        if dragged_card == 10:
-                            card_face[(dragged_card, id(dealer_hand), len(dealer_hand) - 1)] = dragged_face
-                        card_placed = True
-                        update_bias()
-                        break
-                for i, slot in enumerate(PLAYER_SLOTS):
-                    if pygame.Rect(*slot, CARD_WIDTH, CARD_HEIGHT).collidepoint(event.pos):
-                        player_hand.append(dragged_card)
-                        card_suits[(dragged_card, id(player_hand), len(player_hand) - 1)] = previous_suit
-                        if dragged_card == 10:
-                            card_face[(dragged_card, id(player_hand), len(player_hand) - 1)] = dragged_face
-                        card_placed = True
+                    if not card_placed:
+                        pile_index = blackjack.RANKS.index(dragged_card.value)
+                        return_card_to_pile(dragged_card.value, pile_index)
+                        current_pile_suits[pile_index] = dragged_card.suit
+                        if pile_index == 8:
+                            ten_pile_face = dragged_card.face
                         update_bias()
-                        break
+                    else:
+                        calculate_probabilities()  # Live refresh on every drop
 
-                if not card_placed:
-                    return_card_to_pile(dragged_card,
-                                        dragged_card - 2 if dragged_card < 10 else 8 if dragged_card == 10 else 9)
-                    current_pile_suits[
-                        dragged_card - 2 if dragged_card < 10 else 8 if dragged_card == 10 else 9] = previous_suit
-                    update_bias()
+                    dragging = False
+                    dragged_card = None
 
-                dragging = False
-                dragged_card = None
-                dragged_image = None
+                show_discard_info = False
 
-            show_discard_info = False
+        collect_probabilities()
+        clock.tick(FPS)
+        render_frame()
 
-    screen.fill(MAIN_BG)
-    draw_card_piles()
-    draw_slots()
-    draw_hands()
-    draw_probabilities()
-    draw_percentage_bars()
-    for button in buttons:
-        button.draw(screen)
-    render_deck_size_text()
-    draw_discard_pile()
+    pygame.quit()
+    if RENDER_STATS:
+        print(f"Card renderer: {renderer.stats()}", file=sys.stderr)
+    sys.exit()
 
-    if dragging and dragged_image:
-        mouse_pos = pygame.mouse.get_pos()
-        drag_pos = (mouse_pos[0] - CARD_WIDTH // 2, mouse_pos[1] - CARD_HEIGHT // 2)
-        draw_card_background(screen, drag_pos)
-        screen.blit(card_images[dragged_image], drag_pos)
-
-    if show_discard_info:
-        show_discard_popup()
-
-    pygame.display.flip()
 
-pygame.quit()
-sys.exit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+markov.py : absorbing Markov-chain engine for the dealer's play
+
+The dealer follows a fixed policy over hand codes (blackjack.hand_code), so drawing until
+standing is an absorbing Markov chain: standing totals and bust are absorbing, and every other
+state moves on by one card. The outcome distribution comes from pushing the start state through
+MAX_DRAWS transitions, a few small matrix products instead of one recursion branch per card.
+
+Approximation: the first draw is exact for the rank-count vector, and each of its branches then
+continues with fixed rank probabilities taken from the shoe after that first card. Cards drawn
+deeper than that are not removed, which is where the recursion in blackjack.py differs; the gap
+shrinks with the shoe size.
+
+Usage: python markov.py [--decks 1 2 6 8] [--repeat 3]   (benchmark against the recursion)
+"""
+
+from time import perf_counter
+
+import argparse
+
+import numpy as np
+
+import blackjack
+
+# Config
+MAX_DRAWS = 21  # Every draw adds at least 1 to the hard total, so all hands have stopped by then
+
+STATES = tuple(range(blackjack.BUST_CODE))  # Hand codes of every non-bust hand, each its own state index
+BUST = blackjack.BUST_CODE  # Index of the absorbing bust state, after the non-bust codes
+
+_destinations = {}  # stop_value -> (drawing state rows, (rows, 10) destination states)
+
+
+def _destination_table(stop_value: int) -> tuple:
+    """States that still draw at stop_value, and where each rank moves them."""
+    if stop_value not in _destinations:
+        rows = [code for code in STATES if blackjack.BEST_TOTALS[code] < stop_value]
+        destinations = np.array([blackjack.ADD_CARD_TABLE[code] for code in rows], dtype=np.intp)
+        _destinations[stop_value] = (np.array(rows, dtype=np.intp), destinations)
+    return _destinations[stop_value]
+
+
+def transition_matrix(probabilities, stop_value: int) -> np.ndarray:
+    """
+    Build the one-draw transition matrix of a hand that stops at a best total of stop_value.
+
+    :param probabilities: Array (..., 10) of rank probabilities, index 0 for 2s through index 9 for aces
+    :param stop_value: Best total at which the hand stops drawing
+    :return: Array (..., states + 1, states + 1) of transition probabilities, the last state is bust
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    size = len(STATES) + 1
+    matrix = np.zeros(probabilities.shape[:-1] + (size, size))
+    rows, destinations = _destination_table(stop_value)
+
+    absorbing = np.setdiff1d(np.arange(size), rows)
+    matrix[..., absorbing, absorbing] = 1.0
+    for rank in range(len(blackjack.RANKS)):
+        # Within one rank every drawing state has a single destination, so no index repeats
+        matrix[..., rows, destinations[:, rank]] += probabilities[..., rank, None]
+    return matrix
+
+
+def absorbed(probabilities, stop_value: int) -> np.ndarray:
+    """
+    Calculate where every starting state stops when drawing with fixed rank probabilities.
+
+    :param probabilities: Array (..., 10) of rank probabilities
+    :param stop_value: Best total at which the hand stops drawing
+    :return: Array (..., states + 1, states + 1) where row i is the stopping distribution from state i
+    """
+    return np.linalg.matrix_power(transition_matrix(probabilities, stop_value), MAX_DRAWS)
+
+
+def outcome_matrix() -> np.ndarray:
+    """Map every absorbing state to its column of blackjack.DEALER_OUTCOMES."""
+    outcomes = np.zeros((len(STATES) + 1, len(blackjack.DEALER_OUTCOMES)))
+    outcomes[BUST, -1] = 1.0
+    for code in STATES:
+        best = blackjack.BEST_TOTALS[code]
+        if blackjack.DEALER_STAND_VALUE <= best <= 21:  # Codes with a usable ace above hard 11 never occur
+            outcomes[code, best - blackjack.DEALER_STAND_VALUE] = 1.0
+    return outcomes
+
+
+_OUTCOMES = outcome_matrix()
+
+
+def dealer_distribution_counts(counts: tuple, dealer_hand: tuple) -> tuple:
+    """
+    Calculate the dealer's outcome distribution from a rank-count vector with the Markov chain.
+
+    The next card is drawn exactly from counts; deeper draws use the probabilities of the shoe
+    left after that card (see the module docstring).
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param dealer_hand: Tuple containing the dealer's current hand
+    :return: Tuple of 6 probabilities: dealer finishing on 17, 18, 19, 20, 21, then busting
+    """
+    start = blackjack.hand_code(dealer_hand)
+    if start == BUST or blackjack.BEST_TOTALS[start] >= blackjack.DEALER_STAND_VALUE:
+        return tuple(_OUTCOMES[start].tolist())
+
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum()
+    if total == 0:  # Nothing left to draw, as the recursion returns for an empty shoe
+        return (0.0,) * len(blackjack.DEALER_OUTCOMES)
+    ranks = np.flatnonzero(counts)
+
+    # One chain per possible first card, each with the shoe left after drawing it
+    remaining = counts - np.eye(len(blackjack.RANKS))[ranks]
+    remaining_totals = remaining.sum(axis=1, keepdims=True)
+    probabilities = np.divide(remaining, remaining_totals, out=np.zeros_like(remaining), where=remaining_totals > 0)
+    matrices = transition_matrix(probabilities, blackjack.DEALER_STAND_VALUE)
+
+    # Push each branch's state vector through its chain, one draw per product
+    rows, destinations = _destination_table(blackjack.DEALER_STAND_VALUE)
+    vectors = np.zeros((len(ranks), len(STATES) + 1))
+    vectors[np.arange(len(ranks)), destinations[np.searchsorted(rows, start), ranks]] = 1.0
+    for _ in range(MAX_DRAWS - 1):
+        vectors = np.einsum("bs,bst->bt", vectors, matrices)
+    branch_outcomes = vectors @ _OUTCOMES
+    distribution = (counts[ranks] / total) @ branch_outcomes
+    return tuple(distribution.tolist())
+
+
+def benchmark(deck_counts=(1, 2, 6, 8), repeat: int = 3) -> list:
+    """
+    Time the Markov chain against the cold-cache recursion for every upcard of fresh shoes.
+
+    :param deck_counts: Shoe sizes (in decks) to measure
+    :param repeat: Timed runs per engine, the fastest is kept
+    :return: List of (decks, recursion seconds, markov seconds, largest absolute difference) per shoe size
+    """
+    results = []
+    for decks in deck_counts:
+        shoes = []
+        for upcard in blackjack.RANKS:
+            counts = [count * decks for count in blackjack.SINGLE_DECK_COUNTS]
+            counts[upcard - 2] -= 1
+            shoes.append((tuple(counts), (upcard,)))
+
+        recursion_time = markov_time = float("inf")
+        for _ in range(repeat):
+            blackjack.clear_caches()
+            start = perf_counter()
+            exact = [blackjack.dealer_distribution_counts(counts, hand, use_table=False) for counts, hand in shoes]
+            recursion_time = min(recursion_time, perf_counter() - start)
+
+            start = perf_counter()
+            chain = [dealer_distribution_counts(counts, hand) for counts, hand in shoes]
+            markov_time = min(markov_time, perf_counter() - start)
+
+        difference = max(abs(a - b) for row_a, row_b in zip(exact, chain) for a, b in zip(row_a, row_b))
+        results.append((decks, recursion_time, markov_time, difference))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Markov-chain dealer engine against the recursion")
+    parser.add_argument("--decks", type=int, nargs="+", default=[1, 2, 6, 8], help="shoe sizes (default: 1 2 6 8)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per engine (default: 3)")
+    args = parser.parse_args()
+
+    print(f"{'decks':>5} {'recursion':>12} {'markov':>12} {'max diff':>10}")
+    for decks, recursion_time, markov_time, difference in benchmark(args.decks, args.repeat):
+        print(f"{decks:>5} {recursion_time * 1000:>10.2f}ms {markov_time * 1000:>10.2f}ms {difference:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+memo.py : bounded, tunable memo stores used to cache the blackjack recursions
+"""
+
+from collections import OrderedDict
+from collections import namedtuple
+from functools import wraps
+
+# Config
+DEFAULT_MAXSIZE = 20_000
+DEFAULT_POLICY = "lru"
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "maxsize", "currsize", "policy"])
+
+_MISSING = object()  # Sentinel so cached None values still count as hits
+_KWARGS_MARK = object()  # Separates positional and keyword arguments in cache keys
+_tracer = None  # Object with enter(name)/exit(name) told about every uncached call, see set_tracer()
+
+
+class MemoCache:
+    """
+    Base class for a memo store with an entry budget and hit/miss/eviction counters.
+
+    Attributes:
+        maxsize (int): Maximum number of entries to keep (None for unbounded)
+        hits (int): Number of lookups that found a cached value
+        misses (int): Number of lookups that did not
+        evictions (int): Number of entries removed to stay within maxsize
+    """
+
+    policy = None
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Initialise an empty memo store.
+
+        :param maxsize: Maximum number of entries to keep (None for unbounded)
+        """
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError(f"maxsize must be positive or None, not {maxsize}")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Look up a key, updating the hit/miss counters.
+
+        :param key: Hashable cache key
+        :return: The cached value, or the module's _MISSING sentinel
+        """
+        raise NotImplementedError
+
+    def put(self, key, value) -> None:
+        """
+        Store a value, evicting entries according to the policy if over budget.
+
+        :param key: Hashable cache key
+        :param value: Value to store
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the counters.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        """
+        Snapshot the store's counters.
+
+        :return: CacheInfo namedtuple
+        """
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self), self.policy)
+
+
+class LRUCache(MemoCache):
+    """
+    Memo store that evicts the least recently used entry.
+    """
+
+    policy = "lru"
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        super().__init__(maxsize)
+        self._data = OrderedDict()
+
+    def get(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return _MISSING
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        super().clear()
+        self._data.clear()
+
+
+class LFUCache(MemoCache):
+    """
+    Memo store that evicts the least frequently used entry (oldest first on ties).
+    """
+
+    policy = "lfu"
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        super().__init__(maxsize)
+        self._data = {}  # key -> [value, frequency]
+        self._buckets = {}  # frequency -> OrderedDict of keys
+        self._min_frequency = 0
+
+    def _touch(self, key, entry: list) -> None:
+        frequency = entry[1]
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        entry[1] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        self._touch(key, entry)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value) -> None:
+        entry = self._data.get(key)
+        if entry is not None:
+            entry[0] = value
+            self._touch(key, entry)
+            return
+
+        if self.maxsize is not None and len(self._data) >= self.maxsize:
+            bucket = self._buckets[self._min_frequency]
+            evicted, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_frequency]
+            del self._data[evicted]
+            self.evictions += 1
+
+        self._data[key] = [value, 1]
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_frequency = 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        super().clear()
+        self._data.clear()
+        self._buckets.clear()
+        self._min_frequency = 0
+
+
+class ARCCache(MemoCache):
+    """
+    Memo store using Adaptive Replacement Cache (Megiddo & Modha), which balances
+    recency and frequency by tracking recently evicted keys in two ghost lists.
+    """
+
+    policy = "arc"
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        super().__init__(maxsize)
+        self._t1 = OrderedDict()  # Seen once recently (key -> value)
+        self._t2 = OrderedDict()  # Seen at least twice recently (key -> value)
+        self._b1 = OrderedDict()  # Ghost keys evicted from t1
+        self._b2 = OrderedDict()  # Ghost keys evicted from t2
+        self._target = 0.0  # Adaptive target size for t1
+
+    def get(self, key):
+        if key in self._t1:
+            value = self._t1.pop(key)
+            self._t2[key] = value
+        elif key in self._t2:
+            value = self._t2[key]
+            self._t2.move_to_end(key)
+        else:
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return value
+
+    def _replace(self, in_b2: bool) -> None:
+        """
+        Evict one cached entry into the matching ghost list.
+
+        :param in_b2: Whether the key being inserted was found in the b2 ghost list
+        """
+        if self._t1 and (len(self._t1) > self._target or (in_b2 and len(self._t1) == self._target)):
+            evicted, _ = self._t1.popitem(last=False)
+            self._b1[evicted] = None
+        else:
+            evicted, _ = self._t2.popitem(last=False)
+            self._b2[evicted] = None
+        self.evictions += 1
+
+    def put(self, key, value) -> None:
+        if key in self._t1 or key in self._t2:
+            self._t1.pop(key, None)
+            self._t2[key] = value
+            self._t2.move_to_end(key)
+            return
+
+        capacity = self.maxsize
+        if capacity is None:
+            self._t1[key] = value
+            return
+
+        full = len(self._t1) + len(self._t2) >= capacity
+        if key in self._b1:
+            self._target = min(capacity, self._target + max(len(self._b2) / len(self._b1), 1))
+            if full:
+                self._replace(in_b2=False)
+            del self._b1[key]
+            self._t2[key] = value
+            return
+
+        if key in self._b2:
+            self._target = max(0.0, self._target - max(len(self._b1) / len(self._b2), 1))
+            if full:
+                self._replace(in_b2=True)
+            del self._b2[key]
+            self._t2[key] = value
+            return
+
+        l1 = len(self._t1) + len(self._b1)
+        total = l1 + len(self._t2) + len(self._b2)
+        if l1 >= capacity:
+            if len(self._t1) < capacity:
+                self._b1.popitem(last=False)
+                if full:
+                    self._replace(in_b2=False)
+            else:
+                self._t1.popitem(last=False)
+                self.evictions += 1
+        elif total >= capacity:
+            if total >= 2 * capacity:
+                self._b2.popitem(last=False)
+            if full:
+                self._replace(in_b2=False)
+        self._t1[key] = value
+
+    def __len__(self) -> int:
+        return len(self._t1) + len(self._t2)
+
+    def clear(self) -> None:
+        super().clear()
+        self._t1.clear()
+        self._t2.clear()
+        self._b1.clear()
+        self._b2.clear()
+        self._target = 0.0
+
+
+POLICIES = {
+    "lru": LRUCache,
+    "lfu": LFUCache,
+    "arc": ARCCache,
+}
+
+_registry = {}  # name -> memoized function
+
+
+def make_cache(policy: str = DEFAULT_POLICY, maxsize: int = DEFAULT_MAXSIZE) -> MemoCache:
+    """
+    Create an empty memo store.
+
+    :param policy: Eviction policy, one of "lru", "lfu" or "arc"
+    :param maxsize: Maximum number of entries to keep (None for unbounded)
+    :return: A MemoCache instance
+    """
+    try:
+        cache_class = POLICIES[policy.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown cache policy {policy!r}, expected one of {sorted(POLICIES)}") from None
+    return cache_class(maxsize)
+
+
+def memoize(name: str, maxsize: int = DEFAULT_MAXSIZE, policy: str = DEFAULT_POLICY, skip_args: int = 0):
+    """
+    Decorator caching a function's results in a named, configurable memo store.
+
+    The store can be swapped at runtime with configure_cache() and inspected with cache_stats().
+    Stores are not locked, so a memoized function should only be driven from one thread at a time.
+
+    :param name: Registry name used to configure and inspect the store
+    :param maxsize: Maximum number of entries to keep (None for unbounded)
+    :param policy: Eviction policy, one of "lru", "lfu" or "arc"
+    :param skip_args: Number of leading positional arguments left out of the cache key, for mutable
+                      working state that the remaining arguments already identify (default=0)
+    :return: Decorator
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            key = args[skip_args:] if skip_args else args
+            if kwargs:
+                key = key + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+            cache = wrapper.cache
+            value = cache.get(key)
+            if value is _MISSING:
+                if _tracer is None:
+                    value = function(*args, **kwargs)
+                else:
+                    tracer = _tracer
+                    tracer.enter(name)
+                    try:
+                        value = function(*args, **kwargs)
+                    finally:
+                        tracer.exit(name)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = make_cache(policy, maxsize)
+        wrapper.cache_info = lambda: wrapper.cache.info()
+        wrapper.cache_clear = lambda: wrapper.cache.clear()
+        _registry[name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def set_tracer(tracer) -> None:
+    """
+    Install an object notified around every uncached call of a memoized function.
+
+    :param tracer: Object with enter(name) and exit(name) methods, or None to stop tracing
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def configure_cache(name: str, maxsize: int = _MISSING, policy: str = None) -> None:
+    """
+    Change the budget and/or eviction policy of a named memo store.
+
+    The existing entries are discarded and the counters reset.
+
+    :param name: Registry name given to memoize()
+    :param maxsize: New maximum number of entries (None for unbounded, omit to keep the current one)
+    :param policy: New eviction policy (omit to keep the current one)
+    """
+    try:
+        function = _registry[name]
+    except KeyError:
+        raise KeyError(f"No memo store named {name!r}, expected one of {sorted(_registry)}") from None
+    current = function.cache
+    function.cache = make_cache(policy if policy is not None else current.policy,
+                                current.maxsize if maxsize is _MISSING else maxsize)
+
+
+def cache_stats(name: str = None):
+    """
+    Report hit/miss/eviction counters for the memo stores.
+
+    :param name: Registry name of a single store (None for all of them)
+    :return: CacheInfo for the named store, or a dict of name -> CacheInfo
+    """
+    if name is not None:
+        return _registry[name].cache.info()
+    return {store_name: function.cache.info() for store_name, function in _registry.items()}
+
+
+def clear_caches() -> None:
+    """
+    Empty every registered memo store and reset its counters.
+    """
+    for function in _registry.values():
+        function.cache.clear()
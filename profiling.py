@@ -0,0 +1,128 @@
+"""
+profiling.py : opt-in instrumentation for the probability engine
+
+profile() collects a CalculationStats for everything run inside it: per-step timings, the
+number of recursion nodes evaluated per memoized function, the deepest recursion reached,
+cache hits and misses per store and, optionally, peak traced memory. Nothing is recorded and
+the recursions pay only a None check while no profile is active.
+"""
+
+from contextlib import contextmanager
+from time import perf_counter
+
+import memo
+
+
+class CalculationStats:
+    """
+    Measurements collected by profile().
+
+    Attributes:
+        timings (dict): Step label -> seconds, summed over repeated steps
+        nodes (dict): Memoized function name -> recursion nodes evaluated (cache misses computed)
+        max_depth (int): Deepest nesting of memoized calls reached
+        cache (dict): Memo store name -> {"hits": int, "misses": int} during the profile
+        peak_memory (int): Peak traced memory in bytes, or None when memory was not traced
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.nodes = {}
+        self.max_depth = 0
+        self.cache = {}
+        self.peak_memory = None
+        self._depth = 0
+
+    def enter(self, name: str) -> None:
+        """Tracer hook called by memo before evaluating an uncached call."""
+        self.nodes[name] = self.nodes.get(name, 0) + 1
+        self._depth += 1
+        if self._depth > self.max_depth:
+            self.max_depth = self._depth
+
+    def exit(self, name: str) -> None:
+        """Tracer hook called by memo after an uncached call returns."""
+        self._depth -= 1
+
+    def add_timing(self, label: str, seconds: float) -> None:
+        """Add seconds to a step's timing."""
+        self.timings[label] = self.timings.get(label, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        """
+        Export the measurements as plain data, ready for a metrics pipeline.
+
+        :return: Dictionary of the public attributes
+        """
+        return {
+            "timings": dict(self.timings),
+            "nodes": dict(self.nodes),
+            "max_depth": self.max_depth,
+            "cache": {name: dict(counts) for name, counts in self.cache.items()},
+            "peak_memory": self.peak_memory,
+        }
+
+    def __repr__(self):
+        return f"CalculationStats({self.as_dict()})"
+
+
+_active = None  # Innermost CalculationStats being collected
+
+
+def active():
+    """The CalculationStats currently collecting, or None."""
+    return _active
+
+
+def record_timing(label: str, seconds: float) -> None:
+    """
+    Add a step timing to the active profile, if any.
+
+    :param label: Step label
+    :param seconds: Time taken by the step
+    """
+    if _active is not None:
+        _active.add_timing(label, seconds)
+
+
+@contextmanager
+def profile(memory: bool = False):
+    """
+    Collect a CalculationStats for the enclosed calls.
+
+    :param memory: Whether to trace peak memory with tracemalloc, which slows the calls down (default=False)
+    :return: Context manager yielding the CalculationStats, complete once the block exits
+    """
+    global _active
+    import tracemalloc  # Imported on first profile, keeping it out of importing blackjack
+
+    stats = CalculationStats()
+    previous = _active
+    before = memo.cache_stats()
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    elif memory:
+        tracemalloc.reset_peak()
+
+    _active = stats
+    memo.set_tracer(stats)
+    start = perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.add_timing("total", perf_counter() - start)
+        _active = previous
+        memo.set_tracer(previous)
+        if memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+        for name, info in memo.cache_stats().items():
+            old = before.get(name)
+            if old is not None and info.hits >= old.hits and info.misses >= old.misses:
+                hits, misses = info.hits - old.hits, info.misses - old.misses
+            else:  # Store cleared or reconfigured during the profile
+                hits, misses = info.hits, info.misses
+            if hits or misses:
+                stats.cache[name] = {"hits": hits, "misses": misses}
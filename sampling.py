@@ -0,0 +1,168 @@
+"""
+sampling.py : Monte Carlo estimates of the calculator's probabilities with standard errors
+
+Mirrors the exact model in blackjack.py: the dealer and the player each draw from the same
+remaining shoe, without replacement, independently of each other. Every sample plays out one
+dealer hand and one player hand as NumPy arrays, so a batch of samples costs a few array
+operations per drawn card. Batches are added until the standard errors meet a tolerance or a
+time budget runs out.
+
+estimate_exact_seconds predicts the cost of the exact recursion from the shoe and the hand
+depth, which is how calculate_all(mode="auto") picks an engine.
+"""
+
+from collections import namedtuple
+from time import time
+
+import numpy as np
+
+import blackjack
+
+# Config
+BATCH_SAMPLES = 20_000  # Samples drawn per batch before checking the budget
+EXACT_SECONDS_PER_STATE = 5e-5  # Measured cost of one cold exact recursion state
+
+Estimate = namedtuple("Estimate", ["win", "stand", "hit", "errors", "samples"])
+
+_HARD_VALUES = np.array([1 if rank == 11 else rank for rank in blackjack.RANKS], dtype=np.int16)
+_ADD_CARD = np.array(blackjack.ADD_CARD_TABLE, dtype=np.int8)  # blackjack.ADD_CARD_TABLE as an array
+_BEST = np.array(blackjack.BEST_TOTALS, dtype=np.int16)  # Best total per hand code, 0 when busted
+
+
+def _reachable_draws(counts: tuple, gap: int) -> int:
+    """Number of distinct multisets of cards, limited by counts, with a hard total of at most gap."""
+    if gap < 0:
+        return 0
+    ways = [1] + [0] * gap
+    for index, count in enumerate(counts):
+        value = int(_HARD_VALUES[index])
+        new_ways = [0] * (gap + 1)
+        for total, number in enumerate(ways):
+            if number:
+                for taken in range(min(count, (gap - total) // value) + 1):
+                    new_ways[total + taken * value] += number
+        ways = new_ways
+    return sum(ways)
+
+
+def estimate_exact_seconds(counts: tuple, player_state: tuple, dealer_state: tuple) -> float:
+    """
+    Predict the cold-cache time of the exact engine for one game state.
+
+    Every distinct multiset the player or dealer can draw before stopping is one recursion state,
+    so the cost grows with the shoe size (through the counts) and the depth left in each hand.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param player_state: The player's hand state as returned by blackjack.hand_state
+    :param dealer_state: The dealer's hand state as returned by blackjack.hand_state
+    :return: Estimated time in seconds
+    """
+    player_states = _reachable_draws(counts, 20 - player_state[0])
+    dealer_states = _reachable_draws(counts, blackjack.DEALER_STAND_VALUE - 1 - dealer_state[0])
+    return (player_states + dealer_states) * EXACT_SECONDS_PER_STATE
+
+
+def _draw(counts: np.ndarray, rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Draw one card without replacement for each selected row, returning the rank indices."""
+    remaining = counts[rows]
+    cumulative = remaining.cumsum(axis=1)
+    pick = rng.random(len(rows)) * cumulative[:, -1]
+    ranks = (cumulative <= pick[:, None]).sum(axis=1)
+    counts[rows, ranks] -= 1
+    return ranks
+
+
+def _with_cards(counts: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """The selected rows with cards left to draw; the others stop, as the exact recursion does on total == 0."""
+    return rows[counts[rows].sum(axis=1) > 0]
+
+
+def sample_outcomes(counts: tuple, player_state: tuple, dealer_state: tuple, samples: int,
+                    rng: np.random.Generator) -> tuple:
+    """
+    Play out independent dealer and player hands from the remaining shoe.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param player_state: The player's hand state as returned by blackjack.hand_state
+    :param dealer_state: The dealer's hand state as returned by blackjack.hand_state
+    :param samples: Number of samples
+    :param rng: numpy.random.Generator to draw with
+    :return: Tuple of (win, stand) indicator arrays, one entry per sample
+    """
+    shoe = np.broadcast_to(np.asarray(counts, dtype=np.int16), (samples, len(blackjack.RANKS)))
+    if shoe[0].sum() == 0:
+        raise ValueError("Cannot sample from an empty deck")
+
+    # Dealer draws until reaching the stand value; hands are tracked as blackjack hand codes
+    dealer_counts = shoe.copy()
+    code = np.full(samples, blackjack.state_code(dealer_state), dtype=np.int8)
+    rows = _with_cards(dealer_counts, np.flatnonzero((code != blackjack.BUST_CODE)
+                                                     & (_BEST[code] < blackjack.DEALER_STAND_VALUE)))
+    while len(rows):
+        code[rows] = _ADD_CARD[code[rows], _draw(dealer_counts, rows, rng)]
+        rows = rows[(code[rows] != blackjack.BUST_CODE) & (_BEST[code[rows]] < blackjack.DEALER_STAND_VALUE)]
+        rows = _with_cards(dealer_counts, rows)
+    dealer_total = _BEST[code]
+    dealer_busted = code == blackjack.BUST_CODE
+    dealer_finished = dealer_busted | (dealer_total >= blackjack.DEALER_STAND_VALUE)  # False where the shoe ran out
+
+    # Standing wins when the dealer busts or finishes at or below the player's total
+    player_code = blackjack.state_code(player_state)
+    stand = dealer_finished & (dealer_busted | (dealer_total <= blackjack.BEST_TOTALS[player_code]))
+
+    # Overall win: the player draws until reaching the dealer's total without busting
+    player_counts = shoe.copy()
+    code = np.full(samples, player_code, dtype=np.int8)
+    target = np.where(dealer_busted, 0, dealer_total)
+    rows = np.flatnonzero(dealer_finished & (code != blackjack.BUST_CODE) & (_BEST[code] < target))
+    rows = _with_cards(player_counts, rows)
+    while len(rows):
+        code[rows] = _ADD_CARD[code[rows], _draw(player_counts, rows, rng)]
+        rows = rows[(code[rows] != blackjack.BUST_CODE) & (_BEST[code[rows]] < target[rows])]
+        rows = _with_cards(player_counts, rows)
+    win = dealer_finished & (dealer_busted | ((code != blackjack.BUST_CODE) & (_BEST[code] >= target)))
+
+    return win, stand
+
+
+def estimate_all(counts: tuple, player_state: tuple, dealer_state: tuple, time_budget: float = None,
+                 tolerance: float = None, rng=None) -> Estimate:
+    """
+    Estimate win, stand and hit probabilities by sampling until a budget is met.
+
+    Sampling stops once every standard error is at most tolerance, or once time_budget seconds
+    have passed; at least one batch is always drawn.
+
+    :param counts: Tuple of 10 rank counts for the remaining cards in the deck
+    :param player_state: The player's hand state as returned by blackjack.hand_state
+    :param dealer_state: The dealer's hand state as returned by blackjack.hand_state
+    :param time_budget: Maximum sampling time in seconds (default: none)
+    :param tolerance: Target standard error for each probability (default: none)
+    :param rng: numpy.random.Generator or seed (default: freshly seeded)
+    :return: Estimate of (win, stand, hit, standard errors of each, number of samples)
+    """
+    if time_budget is None and tolerance is None:
+        raise ValueError("Sampling needs a time_budget, a tolerance or both")
+    rng = np.random.default_rng(rng)
+
+    start = time()
+    samples = 0
+    sums = np.zeros(3)  # win, stand, hit
+    squares = np.zeros(3)
+    while True:
+        win, stand = sample_outcomes(counts, player_state, dealer_state, BATCH_SAMPLES, rng)
+        hit = win.astype(np.int8) - stand
+        for column, values in enumerate((win, stand, hit)):
+            sums[column] += values.sum()
+            squares[column] += np.square(values, dtype=np.float64).sum()
+        samples += BATCH_SAMPLES
+
+        means = sums / samples
+        errors = np.sqrt(np.maximum(squares / samples - means ** 2, 0.0) / samples)
+        if tolerance is not None and errors.max() <= tolerance:
+            break
+        if time_budget is not None and time() - start >= time_budget:
+            break
+
+    win, stand, hit = means.tolist()
+    return Estimate(win, stand, hit, tuple(errors.tolist()), samples)
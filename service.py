@@ -0,0 +1,373 @@
+"""
+service.py : headless engine service with a local HTTP/JSON API
+
+Runs blackjack.calculate_all as a long-lived local service. An asyncio front end accepts
+HTTP/1.1 requests over TCP or a Unix socket (keep-alive supported) and hands each calculation
+to a process pool. The worker processes live as long as the service, so their memo caches stay
+warm between requests. Every request's latency is recorded, and GET /stats reports percentiles
+over the most recent requests.
+
+Endpoints:
+    POST /calculate  {"hand": [10, 6], "dealer": [7], "decks": 1}   (or "deck": [...] / "counts": [...])
+                     optional "mode", "time_budget", "tolerance" as in blackjack.calculate_all
+    GET  /stats      request counts and latency percentiles in milliseconds
+    GET  /health     {"status": "ok"}
+
+Usage: python service.py [--host 127.0.0.1] [--port 8765] [--unix PATH] [--workers N]
+       (service_client.py sends test requests)
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from math import isfinite
+from time import perf_counter
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+
+import blackjack
+
+# Config
+HOST = "127.0.0.1"
+PORT = 8765
+LATENCY_WINDOW = 10_000  # Recent requests kept for the latency percentiles
+PERCENTILES = (50, 90, 99)
+MAX_BODY = 64 * 1024  # Largest accepted request body in bytes
+MAX_COUNT = (1 << blackjack.COUNT_BITS) - 1  # Most cards of one rank the packed shoe key holds
+MAX_DECKS = MAX_COUNT // max(blackjack.SINGLE_DECK_COUNTS)
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def percentiles(values, points=PERCENTILES) -> dict:
+    """
+    Calculate nearest-rank percentiles.
+
+    :param values: Iterable of measurements
+    :param points: Percentiles to report (0-100)
+    :return: Dictionary of "p<point>" -> value, plus "max"; empty when there are no values
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    result = {f"p{point}": ordered[max(0, -(-point * len(ordered) // 100) - 1)] for point in points}
+    result["max"] = ordered[-1]
+    return result
+
+
+def remaining_shoe(decks: int, cards) -> tuple:
+    """
+    Build a shoe of fresh decks with the dealt cards taken out.
+
+    :param decks: Number of decks in the shoe
+    :param cards: Iterable of the cards already dealt
+    :return: Tuple of the remaining cards
+    """
+    counts = list(blackjack.deck_to_counts(blackjack.SINGLE_DECK * decks))
+    for card in cards:
+        if counts[card - 2] == 0:
+            raise ValueError(f"No {card} left in a {decks}-deck shoe")
+        counts[card - 2] -= 1
+    return blackjack.counts_to_deck(counts)
+
+
+def _integers(request: dict, name: str) -> tuple:
+    """The request field as a tuple of integers, raising ValueError for anything else."""
+    values = request[name]
+    if not isinstance(values, list) or not all(isinstance(value, int) and not isinstance(value, bool)
+                                               for value in values):
+        raise ValueError(f"Expected \"{name}\" to be a list of integers")
+    return tuple(values)
+
+
+def _budget(request: dict, name: str):
+    """The optional request field as a positive, finite number, raising ValueError for anything else."""
+    value = request.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not (isfinite(value) and value > 0):
+        raise ValueError(f"Expected \"{name}\" to be a positive number, got {value!r}")
+    return value
+
+
+def request_counts(request: dict, hand: tuple, dealer: tuple) -> tuple:
+    """
+    Read the remaining shoe of a /calculate request as rank counts.
+
+    :param request: Decoded /calculate body with "counts", "deck" or "decks" (default: 1 deck)
+    :param hand: The player's cards, taken out of a "decks" shoe
+    :param dealer: The dealer's cards, taken out of a "decks" shoe
+    :return: Tuple of 10 rank counts
+    """
+    if "counts" in request:
+        counts = _integers(request, "counts")
+        if len(counts) != len(blackjack.RANKS):
+            raise ValueError(f"Expected {len(blackjack.RANKS)} counts, one per rank 2-11, got {len(counts)}")
+    elif "deck" in request:
+        deck = _integers(request, "deck")
+        for card in deck:
+            if card not in blackjack.RANKS:
+                raise ValueError(f"Card values must be 2-11, got {card} in \"deck\"")
+        counts = blackjack.deck_to_counts(deck)
+    else:
+        decks = request.get("decks", 1)
+        if isinstance(decks, bool) or not isinstance(decks, int) or not 1 <= decks <= MAX_DECKS:
+            raise ValueError(f"Expected \"decks\" to be an integer from 1 to {MAX_DECKS}, got {decks!r}")
+        counts = blackjack.deck_to_counts(remaining_shoe(decks, hand + dealer))
+
+    for count in counts:
+        if not 0 <= count <= MAX_COUNT:
+            raise ValueError(f"Counts must be 0-{MAX_COUNT}, got {count}")
+    return counts
+
+
+def evaluate(request: dict) -> dict:
+    """
+    Calculate the probabilities for one request, in a worker process.
+
+    :param request: Decoded /calculate body
+    :return: Dictionary with win, stand, hit and bust probabilities (and standard errors when sampled)
+    """
+    if "hand" not in request or "dealer" not in request:
+        raise ValueError("Expected \"hand\" and \"dealer\" lists of card values")
+    hand = _integers(request, "hand")
+    dealer = _integers(request, "dealer")
+    for card in hand + dealer:
+        if card not in blackjack.RANKS:
+            raise ValueError(f"Card values must be 2-11, got {card}")
+    counts = request_counts(request, hand, dealer)
+
+    result = blackjack.calculate_all(blackjack.counts_to_deck(counts), hand, dealer, mode=request.get("mode", "exact"),
+                                     time_budget=_budget(request, "time_budget"),
+                                     tolerance=_budget(request, "tolerance"))
+    if hasattr(result, "errors"):  # sampling.Estimate from the sampled and auto modes
+        response = {"win": result.win, "stand": result.stand, "hit": result.hit,
+                    "errors": list(result.errors), "samples": result.samples}
+    else:
+        response = dict(zip(("win", "stand", "hit"), result))
+    response["bust"] = blackjack.player_probability_busted_counts(counts, hand)
+    response["pid"] = os.getpid()
+    return response
+
+
+class EngineService:
+    """
+    The asyncio front end, forwarding calculations to a process pool.
+
+    Attributes:
+        executor (ProcessPoolExecutor): Worker processes holding the warm memo caches
+        latencies (deque): Seconds taken by the most recent /calculate requests
+        requests (int): /calculate requests answered
+        errors (int): /calculate requests that failed
+        in_flight (int): /calculate requests currently being calculated
+    """
+
+    def __init__(self, workers: int = None):
+        """
+        Initialise the service and start its worker processes.
+
+        :param workers: Number of worker processes (default: one per CPU)
+        """
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def stats(self) -> dict:
+        """
+        Summarise the requests served so far.
+
+        :return: Dictionary of counters and latency percentiles in milliseconds
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "latency_ms": {name: seconds * 1000 for name, seconds in percentiles(self.latencies).items()},
+            "window": len(self.latencies),
+        }
+
+    async def calculate(self, body: bytes) -> tuple:
+        """
+        Answer a /calculate request through the process pool.
+
+        :param body: Raw JSON request body
+        :return: Tuple of (HTTP status, response dictionary)
+        """
+        start = perf_counter()
+        self.in_flight += 1
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("Expected a JSON object")
+            response = await asyncio.get_running_loop().run_in_executor(self.executor, evaluate, request)
+            status = 200
+        except ValueError as error:  # Includes malformed JSON
+            status, response = 400, {"error": str(error)}
+        except Exception as error:
+            status, response = 500, {"error": repr(error)}
+        finally:
+            self.in_flight -= 1
+
+        elapsed = perf_counter() - start
+        self.requests += 1
+        if status != 200:
+            self.errors += 1
+        else:
+            self.latencies.append(elapsed)
+            response["elapsed_ms"] = elapsed * 1000
+        return status, response
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple:
+        """
+        Dispatch one request to its endpoint.
+
+        :return: Tuple of (HTTP status, response dictionary)
+        """
+        routes = {"/calculate": "POST", "/stats": "GET", "/health": "GET"}
+        if path not in routes:
+            return 404, {"error": f"Unknown path {path}"}
+        if method != routes[path]:
+            return 405, {"error": f"{path} expects {routes[path]}"}
+
+        if path == "/calculate":
+            return await self.calculate(body)
+        elif path == "/stats":
+            return 200, self.stats()
+        return 200, {"status": "ok"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the requests of one connection until the client closes it.
+        """
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ValueError as error:
+                    await write_response(writer, 400, {"error": str(error)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                if len(body) > MAX_BODY:
+                    await write_response(writer, 413, {"error": f"Body over {MAX_BODY} bytes"}, keep_alive=False)
+                    break
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+                status, response = await self.route(method, path, body)
+                await write_response(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away mid-request
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+
+async def read_request(reader: asyncio.StreamReader):
+    """
+    Read one HTTP/1.1 request.
+
+    :param reader: The connection's stream reader
+    :return: Tuple of (method, path, lower-cased headers, body), or None once the connection is closed
+    """
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise ValueError(f"Malformed request line {line!r}")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(min(length, MAX_BODY + 1)) if length else b""
+    return method, path, headers, body
+
+
+async def write_response(writer: asyncio.StreamWriter, status: int, response: dict, keep_alive: bool = True) -> None:
+    """
+    Write one HTTP/1.1 JSON response.
+
+    :param writer: The connection's stream writer
+    :param status: HTTP status code
+    :param response: Dictionary sent as the JSON body
+    :param keep_alive: Whether the connection stays open for further requests
+    """
+    body = json.dumps(response).encode()
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(host: str = HOST, port: int = PORT, unix: str = None, workers: int = None) -> None:
+    """
+    Run the service until SIGINT or SIGTERM.
+
+    :param host: Interface to listen on (default=HOST)
+    :param port: TCP port to listen on (default=PORT)
+    :param unix: Listen on this Unix socket path instead of TCP (default: TCP)
+    :param workers: Number of worker processes (default: one per CPU)
+    """
+    service = EngineService(workers)
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving on {unix or f'http://{host}:{port}'} with {workers or os.cpu_count()} workers")
+
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, server.close)  # Stops serve_forever below
+        except NotImplementedError:  # No signal handlers on this platform, KeyboardInterrupt still stops it
+            pass
+
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        service.close()
+        if unix and os.path.exists(unix):
+            os.remove(unix)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the probability engine over a local HTTP/JSON API")
+    parser.add_argument("--host", default=HOST, help="interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=PORT, help="TCP port (default: %(default)s)")
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+service_client.py : local test client for service.py
+
+Sends /calculate requests for one game state from several concurrent keep-alive connections,
+then prints a sample response, the client-side latency percentiles and the service's /stats.
+Needs nothing but a running service.
+
+Usage: python service_client.py [--hand 10 6] [--dealer 7] [--decks 1] [--mode exact]
+                                [--requests 100] [--concurrency 8] [--host 127.0.0.1]
+                                [--port 8765] [--unix PATH]
+"""
+
+from time import perf_counter
+
+import argparse
+import asyncio
+import json
+
+import service
+
+
+class Connection:
+    """
+    One keep-alive HTTP/1.1 connection to the service.
+
+    Attributes:
+        reader (asyncio.StreamReader): The connection's stream reader
+        writer (asyncio.StreamWriter): The connection's stream writer
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host: str = service.HOST, port: int = service.PORT, unix: str = None):
+        """
+        Connect to the service.
+
+        :param host: Service host (default=service.HOST)
+        :param port: Service TCP port (default=service.PORT)
+        :param unix: Unix socket path, used instead of TCP when given
+        :return: Connection
+        """
+        if unix:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method: str, path: str, payload: dict = None) -> tuple:
+        """
+        Send one request and wait for its response.
+
+        :param method: HTTP method
+        :param path: Endpoint path
+        :param payload: Dictionary sent as the JSON body (default: no body)
+        :return: Tuple of (HTTP status, decoded response)
+        """
+        body = json.dumps(payload).encode() if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self) -> None:
+        """
+        Close the connection.
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def run(payload: dict, requests: int, concurrency: int, host: str, port: int, unix: str) -> tuple:
+    """
+    Send requests from concurrent connections and collect their latencies.
+
+    :return: Tuple of (first response, list of latencies in seconds, number of failed requests, server stats)
+    """
+    remaining = [requests]
+    latencies = []
+    failures = [0]
+    first = []
+
+    async def worker():
+        connection = await Connection.open(host, port, unix)
+        try:
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                start = perf_counter()
+                status, response = await connection.request("POST", "/calculate", payload)
+                latencies.append(perf_counter() - start)
+                if status != 200:
+                    failures[0] += 1
+                if not first:
+                    first.append(response)
+        finally:
+            await connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+
+    connection = await Connection.open(host, port, unix)
+    _, stats = await connection.request("GET", "/stats")
+    await connection.close()
+    return first[0] if first else None, latencies, failures[0], stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send test requests to the engine service")
+    parser.add_argument("--hand", type=int, nargs="+", default=[10, 6], help="player's cards (default: 10 6)")
+    parser.add_argument("--dealer", type=int, nargs="+", default=[7], help="dealer's cards (default: 7)")
+    parser.add_argument("--decks", type=int, default=1, help="decks in the shoe (default: 1)")
+    parser.add_argument("--mode", default="exact", help="calculation mode (default: exact)")
+    parser.add_argument("--requests", type=int, default=100, help="requests to send (default: 100)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent connections (default: 8)")
+    parser.add_argument("--host", default=service.HOST, help="service host (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=service.PORT, help="service port (default: %(default)s)")
+    parser.add_argument("--unix", default=None, help="service Unix socket path, instead of TCP")
+    args = parser.parse_args()
+
+    payload = {"hand": args.hand, "dealer": args.dealer, "decks": args.decks, "mode": args.mode}
+    start = perf_counter()
+    first, latencies, failures, stats = asyncio.run(run(payload, args.requests, args.concurrency, args.host,
+                                                        args.port, args.unix))
+    elapsed = perf_counter() - start
+
+    print(f"Response: {first}")
+    print(f"{len(latencies)} requests ({failures} failed) in {elapsed:.2f}s, "
+          f"{len(latencies) / elapsed:.0f} requests/s")
+    client = {name: f"{seconds * 1000:.2f}ms" for name, seconds in service.percentiles(latencies).items()}
+    print(f"Client latency: {client}")
+    print(f"Service stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""
+simulator.py : headless multi-round blackjack simulator
+
+Plays hands through a full shoe until the penetration point, then reshuffles. Each shoe is a
+NumPy array shuffled with a single batched permutation and dealt from a cursor, so drawing a
+card is an index into a list instead of random.sample and list.remove. Decisions come from a
+policy: the fixed basic strategy table (fast, 1M+ hands per minute per core), the calculator's
+hit/stand advice, or the composition-dependent EV solver in strategy.py.
+
+Table rules follow strategy.Rules: dealer stands on all 17s and peeks for blackjack, doubling
+on any two cards, one split per hand, split aces receive one card, late surrender.
+
+Long runs are split into fixed-size chunks fanned out across a process pool. Every chunk gets
+its own numpy.random.SeedSequence child of the master seed, and the chunk results are merged
+in chunk order, so the aggregate depends only on the seed and never on the worker count.
+
+Usage: python simulator.py [--hands 1000000] [--decks 8] [--penetration 0.75]
+                           [--policy table|calculator|optimal] [--seed N] [--workers N]
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+from time import time
+
+import argparse
+
+import numpy as np
+
+import blackjack
+import strategy
+
+# Config
+DECKS = 8
+PENETRATION = 0.75  # Fraction of the shoe dealt before reshuffling
+CHUNK_HANDS = 250_000  # Rounds per parallel task, each with its own seed stream
+CONFIDENCE_Z = 1.96  # Normal quantile of the reported confidence intervals (95%)
+
+# Basic strategy for multi-deck S17, DAS, late surrender. One letter per upcard 2..A:
+# H hit, S stand, D double (else hit), d double (else stand), P split, R surrender (else hit)
+HARD_TABLE = {
+    **{total: "HHHHHHHHHH" for total in range(4, 9)},
+    9: "HDDDDHHHHH",
+    10: "DDDDDDDDHH",
+    11: "DDDDDDDDDH",
+    12: "HHSSSHHHHH",
+    13: "SSSSSHHHHH",
+    14: "SSSSSHHHHH",
+    15: "SSSSSHHHRH",
+    16: "SSSSSHHRRR",
+    **{total: "SSSSSSSSSS" for total in range(17, 22)},
+}
+SOFT_TABLE = {  # Keyed by the soft total (ace counted as 11)
+    12: "HHHHHHHHHH",
+    13: "HHHDDHHHHH",
+    14: "HHHDDHHHHH",
+    15: "HHDDDHHHHH",
+    16: "HHDDDHHHHH",
+    17: "HDDDDHHHHH",
+    18: "SddddSSHHH",
+    19: "SSSSSSSSSS",
+    20: "SSSSSSSSSS",
+    21: "SSSSSSSSSS",
+}
+PAIR_TABLE = {  # Keyed by the card value, pairs missing here are played from the total tables
+    2: "PPPPPPHHHH",
+    3: "PPPPPPHHHH",
+    4: "HHHPPHHHHH",
+    6: "PPPPPHHHHH",
+    7: "PPPPPPHHHH",
+    8: "PPPPPPPPPP",
+    9: "PPPPPSPPSS",
+    11: "PPPPPPPPPP",
+}
+
+SimulationResult = namedtuple("SimulationResult",
+                              ["hands", "net", "net_squares", "wins", "losses", "pushes", "shuffles"])
+
+
+class Shoe:
+    """
+    Array-backed shoe dealt from a cursor.
+
+    The whole shoe is shuffled with one permutation from the generator, and dealing advances an
+    index. The hole card stays unseen until revealed, so unseen_deck() includes it. Cards dealt
+    since start_round() are in play, and stay out of the shoe if it runs out mid-round.
+    """
+
+    __slots__ = ("cards", "rng", "position", "round_start", "cut", "hole", "shuffles", "_order")
+
+    def __init__(self, decks: int = DECKS, penetration: float = PENETRATION, rng=None):
+        """
+        :param decks: Number of decks in the shoe (default=DECKS)
+        :param penetration: Fraction of the shoe dealt before reshuffling (default=PENETRATION)
+        :param rng: numpy.random.Generator to shuffle with (default: freshly seeded)
+        """
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {penetration}")
+        self._order = np.array(blackjack.SINGLE_DECK * decks, dtype=np.uint8)
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.cut = int(len(self._order) * penetration)
+        self.shuffles = 0
+        self.shuffle()
+
+    def shuffle(self) -> None:
+        """Reshuffle every card back into the shoe."""
+        self.rng.shuffle(self._order)
+        self.cards = self._order.tolist()
+        self.position = self.round_start = 0
+        self.hole = None
+        self.shuffles += 1
+
+    def start_round(self) -> None:
+        """Mark the cards dealt from here on as in play."""
+        self.round_start = self.position
+
+    def _shuffle_discards(self) -> None:
+        """Reshuffle mid-round, leaving the cards in play (the hole card among them) out of the new shoe."""
+        in_play = self.cards[self.round_start:self.position]
+        self.rng.shuffle(self._order)
+        rest = self._order.tolist()
+        for card in in_play:
+            rest.remove(card)
+        self.cards = in_play + rest
+        self.round_start = 0
+        self.position = len(in_play)
+        self.shuffles += 1
+
+    def needs_shuffle(self) -> bool:
+        """Whether the cut card has been reached."""
+        return self.position >= self.cut
+
+    def draw(self) -> int:
+        """Deal the next card, reshuffling the discards mid-round only if the shoe runs out."""
+        if self.position >= len(self.cards):
+            self._shuffle_discards()
+        card = self.cards[self.position]
+        self.position += 1
+        return card
+
+    def unseen_deck(self) -> tuple:
+        """Cards the player has not seen: the undealt cards plus the dealer's hole card."""
+        unseen = self.cards[self.position:]
+        if self.hole is not None:
+            unseen.append(self.hole)
+        return tuple(unseen)
+
+
+def _final_total(cards: list) -> int:
+    """Best total of a finished hand, or 0 when busted."""
+    return blackjack.BEST_TOTALS[blackjack.hand_code(cards)]
+
+
+def table_policy(cards: list, upcard: int, shoe: Shoe, options: tuple) -> str:
+    """
+    Choose an action from the fixed basic strategy table.
+
+    :param cards: The player's current hand
+    :param upcard: The dealer's upcard (2-11)
+    :param shoe: The shoe being dealt (unused by this policy)
+    :param options: Legal actions, a subset of strategy.ACTIONS
+    :return: The chosen action
+    """
+    column = upcard - 2
+    if "split" in options and cards[0] in PAIR_TABLE:
+        if PAIR_TABLE[cards[0]][column] == "P":
+            return "split"
+
+    code = blackjack.hand_code(cards)
+    best, hard = blackjack.BEST_TOTALS[code], blackjack.HARD_TOTALS[code]
+    if best != hard:  # An ace counts as 11
+        move = SOFT_TABLE[best][column]
+    else:
+        move = HARD_TABLE[hard][column]
+
+    if move == "S":
+        return "stand"
+    if move == "H":
+        return "hit"
+    if move == "R":
+        return "surrender" if "surrender" in options else "hit"
+    if "double" in options:
+        return "double"
+    return "hit" if move == "D" else "stand"
+
+
+def calculator_policy(cards: list, upcard: int, shoe: Shoe, options: tuple) -> str:
+    """
+    Hit or stand following the calculator's probability of winning.
+
+    :param cards: The player's current hand
+    :param upcard: The dealer's upcard (2-11)
+    :param shoe: The shoe being dealt, used for the unseen cards
+    :param options: Legal actions, a subset of strategy.ACTIONS
+    :return: "hit" or "stand"
+    """
+    _, stand, hit = blackjack.calculate_all(shoe.unseen_deck(), tuple(cards), (upcard,))
+    return "hit" if hit > stand else "stand"
+
+
+def optimal_policy(cards: list, upcard: int, shoe: Shoe, options: tuple) -> str:
+    """
+    Choose the legal action with the highest expected value from the strategy solver.
+
+    :param cards: The player's current hand
+    :param upcard: The dealer's upcard (2-11)
+    :param shoe: The shoe being dealt, used for the unseen cards
+    :param options: Legal actions, a subset of strategy.ACTIONS
+    :return: The chosen action
+    """
+    values = strategy.action_values(shoe.unseen_deck(), tuple(cards), (upcard,))
+    return max((action for action in options if action in values), key=values.get)
+
+
+POLICIES = {
+    "table": table_policy,
+    "calculator": calculator_policy,
+    "optimal": optimal_policy,
+}
+
+
+def _play_hand(cards: list, upcard: int, shoe: Shoe, policy, options: tuple) -> tuple:
+    """
+    Play one player hand to completion.
+
+    :param cards: The player's starting cards, extended in place
+    :param upcard: The dealer's upcard (2-11)
+    :param shoe: The shoe being dealt
+    :param policy: Decision function, see table_policy
+    :param options: Legal actions on the first decision
+    :return: Tuple of (bet multiplier, final total or 0 when busted)
+    """
+    bet = 1
+    while True:
+        total = _final_total(cards)
+        if total == 0:
+            return bet, 0
+        if total == 21:
+            return bet, 21
+
+        action = policy(cards, upcard, shoe, options)
+        if action == "stand":
+            return bet, total
+        cards.append(shoe.draw())
+        if action == "double":
+            return 2, _final_total(cards)
+        options = ("stand", "hit")
+
+
+def _play_dealer(cards: list, shoe: Shoe) -> int:
+    """Draw for the dealer until reaching DEALER_STAND_VALUE, return the total or 0 when busted."""
+    while True:
+        total = _final_total(cards)
+        if total == 0 or total >= blackjack.DEALER_STAND_VALUE:
+            return total
+        cards.append(shoe.draw())
+
+
+def play_round(shoe: Shoe, policy=table_policy, rules: strategy.Rules = strategy.DEFAULT_RULES) -> float:
+    """
+    Play a single round against the dealer.
+
+    :param shoe: The shoe being dealt
+    :param policy: Decision function, see table_policy (default=table_policy)
+    :param rules: Table rules (default=strategy.DEFAULT_RULES)
+    :return: Net result in units of the initial bet
+    """
+    shoe.start_round()
+    player = [shoe.draw()]
+    upcard = shoe.draw()
+    player.append(shoe.draw())
+    shoe.hole = shoe.draw()
+    dealer = [upcard, shoe.hole]
+
+    player_natural = player[0] + player[1] == 21
+    if upcard + shoe.hole == 21:  # Dealer peeks and reveals blackjack
+        shoe.hole = None
+        return 0.0 if player_natural else -1.0
+    if player_natural:
+        shoe.hole = None
+        return rules.blackjack_payout
+
+    options = ("stand", "hit", "double")
+    if player[0] == player[1]:
+        options += ("split",)
+    if rules.surrender:
+        options += ("surrender",)
+
+    action = policy(player, upcard, shoe, options)
+    if action == "surrender":
+        shoe.hole = None
+        return -0.5
+
+    if action == "split":
+        split_options = ("stand", "hit", "double") if rules.double_after_split else ("stand", "hit")
+        hands = []
+        for card in player:
+            cards = [card, shoe.draw()]
+            if card == 11:  # Split aces receive one card only
+                hands.append((1, _final_total(cards)))
+            else:
+                hands.append(_play_hand(cards, upcard, shoe, policy, split_options))
+    elif action == "stand":
+        hands = [(1, _final_total(player))]
+    elif action == "double":
+        player.append(shoe.draw())
+        hands = [(2, _final_total(player))]
+    else:
+        player.append(shoe.draw())
+        hands = [_play_hand(player, upcard, shoe, policy, ("stand", "hit"))]
+
+    shoe.hole = None
+    dealer_total = _play_dealer(dealer, shoe) if any(total for _, total in hands) else 0
+
+    net = 0.0
+    for bet, total in hands:
+        if total == 0 or total < dealer_total:
+            net -= bet
+        elif total > dealer_total:
+            net += bet
+    return net
+
+
+def simulate(hands: int, decks: int = DECKS, penetration: float = PENETRATION, policy=table_policy,
+             rules: strategy.Rules = strategy.DEFAULT_RULES, rng=None) -> SimulationResult:
+    """
+    Play many rounds through a shoe, reshuffling at the penetration point.
+
+    :param hands: Number of rounds to play
+    :param decks: Number of decks in the shoe (default=DECKS)
+    :param penetration: Fraction of the shoe dealt before reshuffling (default=PENETRATION)
+    :param policy: Decision function, see table_policy (default=table_policy)
+    :param rules: Table rules (default=strategy.DEFAULT_RULES)
+    :param rng: numpy.random.Generator or seed (default: freshly seeded)
+    :return: SimulationResult with the accumulated sums
+    """
+    shoe = Shoe(decks, penetration, np.random.default_rng(rng))
+    net = net_squares = 0.0
+    wins = losses = pushes = 0
+    for _ in range(hands):
+        if shoe.needs_shuffle():
+            shoe.shuffle()
+        result = play_round(shoe, policy, rules)
+        net += result
+        net_squares += result * result
+        if result > 0:
+            wins += 1
+        elif result < 0:
+            losses += 1
+        else:
+            pushes += 1
+    return SimulationResult(hands, net, net_squares, wins, losses, pushes, shoe.shuffles)
+
+
+def _simulate_chunk(hands: int, decks: int, penetration: float, policy_name: str, rules: strategy.Rules,
+                    seed: np.random.SeedSequence) -> SimulationResult:
+    """Run one parallel task; the policy is passed by name so the task pickles."""
+    return simulate(hands, decks, penetration, POLICIES[policy_name], rules, seed)
+
+
+def merge_results(results) -> SimulationResult:
+    """
+    Combine simulation results by summing each field in the given order.
+
+    :param results: Iterable of SimulationResult
+    :return: SimulationResult covering every round
+    """
+    merged = [0] * len(SimulationResult._fields)
+    for result in results:
+        for field, value in enumerate(result):
+            merged[field] += value
+    return SimulationResult(*merged)
+
+
+def simulate_parallel(hands: int, decks: int = DECKS, penetration: float = PENETRATION, policy: str = "table",
+                      rules: strategy.Rules = strategy.DEFAULT_RULES, seed=None, workers: int = None,
+                      chunk_hands: int = CHUNK_HANDS) -> SimulationResult:
+    """
+    Play many rounds split into independently seeded chunks across worker processes.
+
+    The same seed and chunk_hands always give the same aggregate, whatever the number of workers.
+    Each chunk starts from a freshly shuffled shoe.
+
+    :param hands: Number of rounds to play
+    :param decks: Number of decks in the shoe (default=DECKS)
+    :param penetration: Fraction of the shoe dealt before reshuffling (default=PENETRATION)
+    :param policy: Name of the decision policy in POLICIES (default="table")
+    :param rules: Table rules (default=strategy.DEFAULT_RULES)
+    :param seed: Master seed, an int or numpy.random.SeedSequence (default: fresh entropy)
+    :param workers: Number of worker processes, 1 runs in this process (default: one per CPU)
+    :param chunk_hands: Rounds per chunk (default=CHUNK_HANDS)
+    :return: SimulationResult merged in chunk order
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}, expected one of {sorted(POLICIES)}")
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    sizes = [chunk_hands] * (hands // chunk_hands)
+    if hands % chunk_hands:
+        sizes.append(hands % chunk_hands)
+    streams = seed.spawn(len(sizes))
+
+    arguments = (sizes, [decks] * len(sizes), [penetration] * len(sizes), [policy] * len(sizes),
+                 [rules] * len(sizes), streams)
+    if workers == 1:
+        return merge_results(map(_simulate_chunk, *arguments))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map keeps the chunk order, so the merge is deterministic
+        return merge_results(executor.map(_simulate_chunk, *arguments))
+
+
+def expected_value(result: SimulationResult, z: float = CONFIDENCE_Z) -> tuple:
+    """
+    Calculate the mean result per round and its confidence interval.
+
+    :param result: Result of simulate()
+    :param z: Normal quantile of the interval (default=CONFIDENCE_Z)
+    :return: Tuple of (mean, lower bound, upper bound) in units of the initial bet
+    """
+    mean = result.net / result.hands
+    variance = max(result.net_squares / result.hands - mean * mean, 0.0)
+    margin = z * sqrt(variance / result.hands)
+    return mean, mean - margin, mean + margin
+
+
+def win_rate(result: SimulationResult, z: float = CONFIDENCE_Z) -> tuple:
+    """
+    Calculate the fraction of rounds won and its confidence interval.
+
+    :param result: Result of simulate()
+    :param z: Normal quantile of the interval (default=CONFIDENCE_Z)
+    :return: Tuple of (rate, lower bound, upper bound)
+    """
+    rate = result.wins / result.hands
+    margin = z * sqrt(rate * (1 - rate) / result.hands)
+    return rate, rate - margin, rate + margin
+
+
+def report(result: SimulationResult, elapsed: float) -> str:
+    """
+    Format a simulation result for printing.
+
+    :param result: Result of simulate()
+    :param elapsed: Wall time of the simulation in seconds
+    :return: Multi-line summary
+    """
+    ev, ev_low, ev_high = expected_value(result)
+    rate, rate_low, rate_high = win_rate(result)
+    return "\n".join([
+        f"Hands: {result.hands} in {elapsed:.1f}s ({result.hands / max(elapsed, 1e-9) * 60:,.0f} hands/min), "
+        f"{result.shuffles} shuffles",
+        f"Wins / losses / pushes: {result.wins} / {result.losses} / {result.pushes}",
+        f"Win rate: {rate * 100:.3f}% [{rate_low * 100:.3f}%, {rate_high * 100:.3f}%]",
+        f"EV per hand: {ev * 100:+.3f}% [{ev_low * 100:+.3f}%, {ev_high * 100:+.3f}%]",
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate blackjack rounds through a shoe")
+    parser.add_argument("--hands", type=int, default=1_000_000, help="rounds to play (default: 1000000)")
+    parser.add_argument("--decks", type=int, default=DECKS, help=f"decks in the shoe (default: {DECKS})")
+    parser.add_argument("--penetration", type=float, default=PENETRATION,
+                        help=f"fraction dealt before reshuffling (default: {PENETRATION})")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="table",
+                        help="decision policy (default: table)")
+    parser.add_argument("--seed", type=int, default=None, help="master random seed (default: fresh entropy)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    seed = np.random.SeedSequence(args.seed)
+    start = time()
+    result = simulate_parallel(args.hands, args.decks, args.penetration, args.policy, seed=seed, workers=args.workers)
+    print(report(result, time() - start))
+    print(f"Seed: {seed.entropy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+test_blackjack.py : the exact engine against brute-force enumeration on small shoes
+
+Every ordering of a small shoe is dealt out card by card, so the expected values come from
+counting orderings rather than from the memoised recursions, hand codes or packed shoe keys.
+"""
+
+from itertools import permutations
+
+import pytest
+
+import blackjack
+
+SHOES = [
+    (),  # Empty shoe
+    (10, 10, 10, 10),  # Single rank
+    (11, 11, 11),  # Single rank, aces only
+    (2, 3),
+    (2, 3, 10, 10, 6),
+    (2, 3, 4, 10, 11, 7),
+    (11, 11, 5, 10, 6, 2),
+]
+HANDS = [(), (11,), (10, 6), (2, 2), (11, 11), (11, 10), (10, 10, 5)]
+UPCARDS = [2, 6, 7, 10, 11]
+
+
+def best_total(cards) -> int:
+    """Best total of the cards, counting one ace as 11 where that does not bust."""
+    total = sum(1 if card == 11 else card for card in cards)
+    if 11 in cards and total + 10 <= 21:
+        total += 10
+    return total
+
+
+def play(cards, order, stop_value: int):
+    """Draw from order until the best total reaches stop_value, or None when the cards run out."""
+    cards = list(cards)
+    draws = iter(order)
+    while best_total(cards) < stop_value:
+        card = next(draws, None)
+        if card is None:
+            return None
+        cards.append(card)
+    return best_total(cards)
+
+
+def orderings(shoe) -> list:
+    """Every ordering of the shoe, duplicates included, so each is equally likely."""
+    return list(permutations(shoe))
+
+
+def brute_dealer_distribution(shoe, dealer_hand) -> tuple:
+    """Dealer outcome distribution ordered as blackjack.DEALER_OUTCOMES."""
+    outcomes = [0] * len(blackjack.DEALER_OUTCOMES)
+    orders = orderings(shoe)
+    for order in orders:
+        total = play(dealer_hand, order, blackjack.DEALER_STAND_VALUE)
+        if total is None:
+            continue
+        outcomes[-1 if total > 21 else total - blackjack.DEALER_STAND_VALUE] += 1
+    return tuple(count / len(orders) for count in outcomes)
+
+
+def brute_calculate_all(shoe, hand, dealer_card) -> tuple:
+    """Win, stand and hit probabilities with the player and dealer drawing independently from the shoe."""
+    dealer = brute_dealer_distribution(shoe, dealer_card)
+    orders = orderings(shoe)
+    win = dealer[-1]
+    for target, probability in zip(blackjack.DEALER_OUTCOMES[:-1], dealer[:-1]):
+        reached = 0
+        for order in orders:
+            total = play(hand, order, target)
+            reached += total is not None and target <= total <= 21
+        win += probability * reached / len(orders)
+
+    player = best_total(hand)
+    stand = dealer[-1] + sum(probability for target, probability in zip(blackjack.DEALER_OUTCOMES[:-1], dealer[:-1])
+                             if player <= 21 and target <= player)
+    return win, stand, win - stand
+
+
+@pytest.mark.parametrize("shoe", SHOES)
+@pytest.mark.parametrize("dealer_hand", [(upcard,) for upcard in UPCARDS] + [(), (10, 6), (11, 5), (10, 10, 5)])
+def test_dealer_distribution(shoe, dealer_hand):
+    expected = brute_dealer_distribution(shoe, dealer_hand)
+    assert blackjack.dealer_distribution(shoe, dealer_hand) == pytest.approx(expected, abs=1e-12)
+    counts = blackjack.deck_to_counts(shoe)
+    assert blackjack.dealer_distribution_counts(counts, dealer_hand, use_table=False) == pytest.approx(expected,
+                                                                                                     abs=1e-12)
+
+
+@pytest.mark.parametrize("shoe", SHOES)
+@pytest.mark.parametrize("hand", HANDS)
+def test_player_probability_busted(shoe, hand):
+    if not shoe or best_total(hand) > 21:
+        expected = 0.0
+    else:
+        expected = sum(best_total(hand + (card,)) > 21 for card in shoe) / len(shoe)
+    assert blackjack.player_probability_busted(shoe, hand) == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize("shoe", SHOES)
+@pytest.mark.parametrize("hand", HANDS)
+@pytest.mark.parametrize("upcard", UPCARDS)
+def test_calculate_all(shoe, hand, upcard):
+    expected = brute_calculate_all(shoe, hand, (upcard,))
+    assert blackjack.calculate_all(shoe, hand, (upcard,)) == pytest.approx(expected, abs=1e-12)
+
+
+def test_calculate_all_cold_and_warm_agree():
+    shoe, hand, dealer_card = (2, 3, 4, 10, 11, 7), (10, 2), (6,)
+    blackjack.clear_caches()
+    cold = blackjack.calculate_all(shoe, hand, dealer_card)
+    assert blackjack.calculate_all(shoe, hand, dealer_card) == cold
+    assert cold == pytest.approx(brute_calculate_all(shoe, hand, dealer_card), abs=1e-12)
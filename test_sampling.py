@@ -0,0 +1,19 @@
+"""
+test_sampling.py : sampled mode against the exact engine on shoes small enough to run out
+"""
+
+import pytest
+
+import blackjack
+
+
+@pytest.mark.parametrize("deck, hand, dealer_card", [
+    ((2, 3), (10, 5), (9,)),  # Dealer runs out of cards in every sample
+    ((2, 3, 10, 10, 6), (10, 5), (9,)),
+    ((2, 3, 4, 10, 11, 7), (10, 2), (5,)),
+])
+def test_sampled_small_shoe_matches_exact(deck, hand, dealer_card):
+    exact = blackjack.calculate_all(deck, hand, dealer_card)
+    estimate = blackjack.calculate_all(deck, hand, dealer_card, mode="sampled", tolerance=0.002, rng=1)
+    for value, expected, error in zip(estimate[:3], exact, estimate.errors):
+        assert value == pytest.approx(expected, abs=5 * error + 1e-12)
@@ -4,11 +4,16 @@ game.py : a simple demonstration of the blackjack calculator
 """
 
 from blackjack import *
+import logging
 import random
+import sys
 
 # Config
 DEBUG_MODE = False
 
+if DEBUG_MODE:
+    logging.basicConfig(stream=sys.stderr, level=logging.DEBUG)
+
 EMPTY_DECK = (2, 2, 2, 2,
               3, 3, 3, 3,
               4, 4, 4, 4,
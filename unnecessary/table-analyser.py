@@ -6,6 +6,12 @@ import blackjack
 import csv
 import os
 
+from generate_tables import generate_tables
+
+# Config
+DECKS = 1
+TABLE_FILE = os.path.join('..', 'tables', f"blackjack_probs_{DECKS}_deck.csv")
+
 
 class BlackjackAnalyzer(tk.Tk):
     def __init__(self):
@@ -33,32 +39,25 @@ class BlackjackAnalyzer(tk.Tk):
 
     @staticmethod
     def _create_standard_deck() -> List[int]:
-        """Create a standard 52-card deck represented as values"""
-        deck = []
-        for i in range(2, 10):
-            deck.extend([i] * 4)
-        deck.extend([10] * 16)
-        deck.extend([11] * 4)
-        return deck
+        """Create a shoe of DECKS standard 52-card decks represented as values"""
+        return list(blackjack.SINGLE_DECK * DECKS)
 
     @staticmethod
     def _load_probability_cache() -> Dict:
-        """Load all probabilities from CSV files"""
+        """Load all probabilities from the merged CSV table"""
         cache = {}
-        for dealer_card in range(2, 12):
-            filename = os.path.join('../single_deck_table', f"blackjack_probs_{dealer_card}.csv")
-            if os.path.exists(filename):
-                cache[dealer_card] = {}
-                with open(filename, 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        card1 = int(row['card1'])
-                        card2 = int(row['card2'])
-                        cache[dealer_card][(card1, card2)] = {
-                            'total_prob': float(row['total_prob']),
-                            'stand_prob': float(row['stand_prob']),
-                            'hit_prob': float(row['hit_prob'])
-                        }
+        if os.path.exists(TABLE_FILE):
+            with open(TABLE_FILE, 'r') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    dealer_card = int(row['dealer_card'])
+                    card1 = int(row['card1'])
+                    card2 = int(row['card2'])
+                    cache.setdefault(dealer_card, {})[(card1, card2)] = {
+                        'total_prob': float(row['total_prob']),
+                        'stand_prob': float(row['stand_prob']),
+                        'hit_prob': float(row['hit_prob'])
+                    }
         return cache
 
     def _create_widgets(self):
@@ -219,50 +218,14 @@ class BlackjackAnalyzer(tk.Tk):
         self.ev_label.config(text=f"Expected Win: {expected_value:.2f}%")
 
 
-def generate_probability_files():
-    """Generate CSV files containing all probabilities for each dealer card"""
-    # Create directory if it doesn't exist
-    if not os.path.exists('../single_deck_table'):
-        os.makedirs('../single_deck_table')
-
-    deck = []
-    for i in range(2, 10):
-        deck.extend([i] * 4)
-    deck.extend([10] * 16)
-    deck.extend([11] * 4)
-
-    # Generate for each dealer card
-    for dealer_card in range(2, 12):
-        filename = os.path.join('../single_deck_table', f"blackjack_probs_{dealer_card}.csv")
-
-        with open(filename, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['card1', 'card2', 'total_prob', 'stand_prob', 'hit_prob'])
-
-            for card1 in range(2, 12):
-                for card2 in range(2, 12):
-                    # Calculate remaining deck
-                    remaining_deck = deck.copy()
-                    remaining_deck.remove(card1)
-                    remaining_deck.remove(card2)
-                    remaining_deck.remove(dealer_card)
-
-                    # Calculate probabilities
-                    total_prob, stand_prob, hit_prob = blackjack.calculate_all(
-                        tuple(remaining_deck),
-                        tuple([card1, card2]),
-                        tuple([dealer_card])
-                    )
-
-                    writer.writerow([card1, card2, total_prob, stand_prob, hit_prob])
-
-        print(f"Generated {filename}")
+def generate_probability_files(workers: int = None):
+    """Generate the merged CSV table of all probabilities, one worker process per dealer card"""
+    generate_tables(decks=DECKS, workers=workers, output=TABLE_FILE)
+    print(f"Generated {TABLE_FILE}")
 
 
 if __name__ == "__main__":
-    if not os.path.exists('../single_deck_table') or \
-            not all(os.path.exists(os.path.join('../single_deck_table', f"blackjack_probs_{i}.csv"))
-                    for i in range(2, 12)):
+    if not os.path.exists(TABLE_FILE):
         print("Generating probability files...")
         generate_probability_files()
 